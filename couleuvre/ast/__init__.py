@@ -2,10 +2,12 @@ from couleuvre.ast.environment import (
     VyperEnvironment,
     SystemEnvironment,
     CouleuvreEnvironment,
+    is_environment_ready,
     resolve_environment,
+    reset_environments,
 )
 from couleuvre.ast.nodes import AST_CLASS_MAP, BaseNode
-from couleuvre.ast.parser import get_json_ast
+from couleuvre.ast.parser import get_json_ast, get_json_asts
 
 __all__ = [
     "AST_CLASS_MAP",
@@ -13,6 +15,9 @@ __all__ = [
     "VyperEnvironment",
     "SystemEnvironment",
     "CouleuvreEnvironment",
+    "is_environment_ready",
     "resolve_environment",
+    "reset_environments",
     "get_json_ast",
+    "get_json_asts",
 ]
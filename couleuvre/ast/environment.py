@@ -12,15 +12,25 @@ import os
 import subprocess
 import sys
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
-from packaging.version import Version
+from packaging.version import InvalidVersion, Version
 
-from couleuvre.ast.vyper_wrapper import ensure_vyper_version
+from couleuvre.ast.vyper_wrapper import ensure_vyper_version, is_vyper_version_installed
+from couleuvre.ast.worker import get_worker_pool
 
 logger = logging.getLogger("couleuvre")
 
+# Environment variables not passed on to the interpreters of managed venvs
+_SERVER_PYTHON_VARIABLES = frozenset(
+    {"PYTHONPATH", "PYTHONHOME", "PYTHONSTARTUP", "VIRTUAL_ENV", "PYTHONUSERBASE"}
+)
+
+# sys.path of managed venv interpreters, with the venv mtime it was read at
+_sys_path_cache: Dict[str, Tuple[Optional[int], list[str]]] = {}
+
 
 class VyperEnvironment(ABC):
     """
@@ -31,6 +41,11 @@ class VyperEnvironment(ABC):
     - vyper_version: The version of Vyper in this environment
     """
 
+    def __init__(self) -> None:
+        # Search paths by include_sys_path, each stored alongside the state of
+        # the environment they were built for (see _sys_path_state)
+        self._search_paths: Dict[bool, Tuple[Optional[int], list[str]]] = {}
+
     @property
     @abstractmethod
     def python_bin(self) -> str:
@@ -43,6 +58,14 @@ class VyperEnvironment(ABC):
         """Return the Vyper version string."""
         ...
 
+    @property
+    def subprocess_env(self) -> Optional[Dict[str, str]]:
+        """
+        Return the environment variables of this environment's interpreter
+        processes, or None to inherit those of the server.
+        """
+        return None
+
     def get_sys_path(self) -> list[str]:
         """
         Obtain all the system paths in which the compiler would
@@ -56,7 +79,9 @@ class VyperEnvironment(ABC):
             "import json, sys; print(json.dumps(sys.path))",
         ]
 
-        result = subprocess.run(command, capture_output=True, text=True)
+        result = subprocess.run(
+            command, capture_output=True, text=True, env=self.subprocess_env
+        )
         if result.returncode != 0:
             logger.warning(
                 "Unable to read sys.path from %s: %s",
@@ -73,6 +98,14 @@ class VyperEnvironment(ABC):
 
         return paths
 
+    def _sys_path_state(self) -> Optional[int]:
+        """
+        Return the state of the environment its sys.path depends on, search
+        paths built for another state being stale. The server's own sys.path
+        does not change.
+        """
+        return None
+
     def get_search_paths(self, include_sys_path: bool = True) -> list[str]:
         """
         Build the search path list passed to Vyper's FilesystemInputBundle.
@@ -80,36 +113,53 @@ class VyperEnvironment(ABC):
         - If include_sys_path is False, return an empty list (no search paths).
         - If include_sys_path is True, obtain sys.path from the environment's
           Python interpreter and include "." for workspace resolution.
+
+        The list is computed once per environment and state of the environment
+        (e.g. until a managed venv changes), see reset_environments. A failed
+        read of sys.path is not kept, but retried on the next call.
         """
+        state = self._sys_path_state() if include_sys_path else None
+        cached = self._search_paths.get(include_sys_path)
+        if cached is not None and cached[0] == state:
+            return list(cached[1])
+
         search_paths: list[str] = []
+        sys_path_read = True
 
         if include_sys_path:
-            search_paths.extend(self.get_sys_path())
+            sys_path = self.get_sys_path()
+            sys_path_read = bool(sys_path)
+            search_paths.extend(sys_path)
             if "." not in search_paths:
                 search_paths.append(".")
 
         logger.info(f"Final search paths: {search_paths}")
-        return search_paths
-
-    def run_script(
-        self, script: str, cwd: Optional[str] = None
+        if sys_path_read:
+            self._search_paths[include_sys_path] = (state, search_paths)
+        return list(search_paths)
+
+    def run_worker_script(
+        self,
+        script: str,
+        cwd: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None,
     ) -> subprocess.CompletedProcess:
         """
-        Run a Python script in this environment.
+        Run a Python script in one of this environment's long-lived workers.
+
+        The interpreter (and its imported Vyper modules) is reused across
+        calls. stdout and stderr are returned as bytes.
 
         Args:
             script: The Python script to execute
-            cwd: Working directory for the subprocess
+            cwd: Working directory for the script
+            args: JSON-serializable arguments, bound to `args` in the script
 
         Returns:
             The completed process result
         """
-        return subprocess.run(
-            [self.python_bin, "-c", script],
-            capture_output=True,
-            text=True,
-            cwd=cwd,
-        )
+        pool = get_worker_pool(self.python_bin, env=self.subprocess_env)
+        return pool.run(script, cwd=cwd, args=args)
 
 
 class SystemEnvironment(VyperEnvironment):
@@ -121,6 +171,7 @@ class SystemEnvironment(VyperEnvironment):
     """
 
     def __init__(self, vyper_version: str):
+        super().__init__()
         self._vyper_version = vyper_version
         logger.info("Using system environment's vyper %s", vyper_version)
 
@@ -132,6 +183,15 @@ class SystemEnvironment(VyperEnvironment):
     def vyper_version(self) -> str:
         return self._vyper_version
 
+    def get_sys_path(self) -> list[str]:
+        # Vyper runs in this very interpreter, no need to ask a subprocess.
+        # The first entry is the directory of the server's entry point, where
+        # a `python -c` subprocess has the current directory ('')
+        paths = list(sys.path)
+        if paths and not getattr(sys.flags, "safe_path", False):
+            paths[0] = ""
+        return paths
+
 
 class CouleuvreEnvironment(VyperEnvironment):
     """
@@ -142,8 +202,18 @@ class CouleuvreEnvironment(VyperEnvironment):
     """
 
     def __init__(self, vyper_version: str):
+        super().__init__()
         self._vyper_version = vyper_version
         self._venv_path = ensure_vyper_version(vyper_version)
+        self._python_bin = str(self._venv_path / "bin" / "python")
+        # Variables of the server's own Python setup could shadow the venv's
+        # packages (e.g. another vyper on PYTHONPATH)
+        self._subprocess_env = {
+            key: value
+            for key, value in os.environ.items()
+            if key not in _SERVER_PYTHON_VARIABLES
+        }
+        self._subprocess_env["VIRTUAL_ENV"] = str(self._venv_path)
         logger.info(
             "Using couleuvre-managed vyper %s at %s",
             vyper_version,
@@ -152,18 +222,40 @@ class CouleuvreEnvironment(VyperEnvironment):
 
     @property
     def python_bin(self) -> str:
-        return os.path.join(self._venv_path, "bin", "python")
+        return self._python_bin
 
     @property
     def vyper_version(self) -> str:
         return self._vyper_version
 
+    @property
+    def subprocess_env(self) -> Optional[Dict[str, str]]:
+        return self._subprocess_env
+
     @property
     def venv_path(self) -> Path:
         """Return the path to the managed virtual environment."""
         return self._venv_path
 
+    def _sys_path_state(self) -> Optional[int]:
+        # sys.path of the venv interpreter only changes when the venv does
+        try:
+            return os.stat(self._venv_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def get_sys_path(self) -> list[str]:
+        venv_mtime = self._sys_path_state()
+        cached = _sys_path_cache.get(self._python_bin)
+        if cached is None or cached[0] != venv_mtime:
+            paths = super().get_sys_path()
+            if not paths:
+                return paths
+            cached = _sys_path_cache[self._python_bin] = (venv_mtime, paths)
+        return list(cached[1])
+
 
+@lru_cache(maxsize=8)
 def resolve_environment(vyper_version: str) -> VyperEnvironment:
     """
     Resolve the appropriate environment for the given Vyper version.
@@ -172,6 +264,8 @@ def resolve_environment(vyper_version: str) -> VyperEnvironment:
     returns a SystemEnvironment. Otherwise, returns a CouleuvreEnvironment
     which will create/use a managed virtual environment.
 
+    Environments are memoized until reset_environments is called.
+
     Args:
         vyper_version: The required Vyper version string
 
@@ -180,12 +274,55 @@ def resolve_environment(vyper_version: str) -> VyperEnvironment:
     """
     from couleuvre import utils
 
-    try:
-        installed_version = utils.get_installed_vyper_version()
-    except Exception:
-        installed_version = None
-
+    installed_version = utils.get_installed_vyper_version()
     if installed_version and installed_version == Version(vyper_version):
         return SystemEnvironment(vyper_version)
     else:
         return CouleuvreEnvironment(vyper_version)
+
+
+def is_environment_ready(vyper_version: str) -> bool:
+    """
+    Check if a Vyper version can be used without creating an environment,
+    i.e. it is installed in the server's environment or in a managed venv.
+    """
+    from couleuvre import utils
+
+    installed_version = utils.get_installed_vyper_version()
+    try:
+        if installed_version and installed_version == Version(vyper_version):
+            return True
+    except InvalidVersion:
+        return False
+    return is_vyper_version_installed(vyper_version)
+
+
+def reset_environments() -> None:
+    """
+    Forget resolved environments and their search paths, so that changes to
+    the Python environments are picked up.
+    """
+    from couleuvre import utils
+
+    resolve_environment.cache_clear()
+    utils.get_installed_vyper_version.cache_clear()
+    _sys_path_cache.clear()
+
+
+def prewarm_environment(vyper_version: str) -> None:
+    """
+    Create the environment of a Vyper version if needed and start one of its
+    workers with the compiler imported, so that the first parse of a file
+    finds both ready.
+
+    Args:
+        vyper_version: The Vyper version to prepare
+    """
+    env = resolve_environment(vyper_version)
+    result = env.run_worker_script("import vyper.compiler")
+    if result.returncode != 0:
+        logger.warning(
+            "Unable to import vyper %s: %s",
+            vyper_version,
+            result.stderr.decode(errors="replace").strip(),
+        )
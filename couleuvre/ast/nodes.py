@@ -1,8 +1,19 @@
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Type, TypeVar
 
+# AST node classes by name, filled in by @_register as they are declared
+AST_CLASS_MAP: Dict[str, Type["BaseNode"]] = {}
 
-@dataclass(eq=False)
+_NodeT = TypeVar("_NodeT", bound=Type["BaseNode"])
+
+
+def _register(cls: _NodeT) -> _NodeT:
+    AST_CLASS_MAP[cls.__name__] = cls
+    return cls
+
+
+@_register
+@dataclass(eq=False, slots=True)
 class BaseNode:
     ast_type: str
     src: Optional[str] = None
@@ -17,17 +28,22 @@ class BaseNode:
         return hash(self.node_id)
 
     def __eq__(self, other):
-        return isinstance(other, BaseNode) and self.node_id == other.node_id
+        # Set and dict lookups mostly compare a node with itself
+        return self is other or (
+            isinstance(other, BaseNode) and self.node_id == other.node_id
+        )
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class TopLevel(BaseNode):
     name: Optional[str] = None
     body: List[Any] = field(default_factory=list)
     doc_string: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Module(TopLevel):
     path: Optional[str] = None
     body: List[Any] = field(default_factory=list)
@@ -38,7 +54,8 @@ class Module(TopLevel):
     source_sha256sum: Optional[str] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class FunctionDef(TopLevel):
     args: Optional[Any] = None
     returns: Optional[Any] = None
@@ -46,346 +63,411 @@ class FunctionDef(TopLevel):
     pos: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class DocStr(BaseNode):
     value: str = ""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class arguments(BaseNode):
     args: List[Any] = field(default_factory=list)
     defaults: List[Any] = field(default_factory=list)
     default: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class arg(BaseNode):
     arg: str = ""
     annotation: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Return(BaseNode):
     value: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Expr(BaseNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class NamedExpr(BaseNode):
     target: Any = None
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Log(BaseNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class FlagDef(TopLevel):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class EventDef(TopLevel):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class InterfaceDef(TopLevel):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class StructDef(TopLevel):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ExprNode(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Constant(ExprNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Num(Constant):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Int(Num):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Decimal(Num):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Hex(Constant):
     value: str = ""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Str(Constant):
     value: str = ""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Bytes(Constant):
     value: bytes = b""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class HexBytes(BaseNode):
     value: Optional[bytes] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ListNode(BaseNode):  # to avoid clashing with built-in `list`
     elements: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class TupleNode(BaseNode):  # to avoid clashing with built-in `tuple`
     elements: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class NameConstant(BaseNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Ellipsis(BaseNode):
     value: Optional[Any] = None  # will be a string from `node_source_code`
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class DictNode(BaseNode):  # to avoid clashing with built-in `Dict`
     keys: List[Any] = field(default_factory=list)
     values: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Name(BaseNode):
     id: str = ""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class UnaryOp(BaseNode):
     op: Any = None
     operand: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Operator(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class USub(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Not(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Invert(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class BinOp(BaseNode):
     left: Any = None
     op: Any = None
     right: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Add(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Sub(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Mult(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Div(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class FloorDiv(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Mod(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Pow(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class BitAnd(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class BitOr(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class BitXor(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class LShift(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class RShift(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class BoolOp(BaseNode):
     op: Any = None
     values: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class And(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Or(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Compare(BaseNode):
     left: Any = None
     op: Any = None
     right: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Eq(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class NotEq(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Lt(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class LtE(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Gt(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class GtE(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class In(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class NotIn(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Call(BaseNode):
     func: Any = None
     args: List[Any] = field(default_factory=list)
     keywords: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ExtCall(BaseNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class StaticCall(BaseNode):
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class keyword(BaseNode):
     arg: Optional[str] = None
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Attribute(BaseNode):
     value: Any = None
     attr: str = ""
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Subscript(BaseNode):
     value: Any = None
     slice: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Assign(BaseNode):
     target: Any = None
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class AnnAssign(BaseNode):
     target: Any = None
     annotation: Any = None
     value: Optional[Any] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class VariableDecl(BaseNode):
     target: Any = None
     annotation: Any = None
@@ -397,37 +479,43 @@ class VariableDecl(BaseNode):
     is_reentrant: Optional[bool] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class AugAssign(BaseNode):
     op: Any = None
     target: Any = None
     value: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Raise(BaseNode):
     exc: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Assert(BaseNode):
     test: Any = None
     msg: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Pass(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Import(BaseNode):
     name: Optional[str] = None
     alias: Optional[str] = None
     import_info: Optional[Dict] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ImportFrom(BaseNode):
     name: Optional[str] = None
     alias: Optional[str] = None
@@ -436,59 +524,61 @@ class ImportFrom(BaseNode):
     import_info: Optional[Dict] = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ImplementsDecl(BaseNode):
     annotation: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class UsesDecl(BaseNode):
     annotation: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class InitializesDecl(BaseNode):
     annotation: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class ExportsDecl(BaseNode):
     annotation: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class If(BaseNode):
     test: Any = None
     body: List[Any] = field(default_factory=list)
     orelse: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class IfExp(BaseNode):
     test: Any = None
     body: Any = None
     orelse: Any = None
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class For(BaseNode):
     target: Any = None
     iter: Any = None
     body: List[Any] = field(default_factory=list)
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Break(BaseNode):
     pass
 
 
-@dataclass(eq=False)
+@_register
+@dataclass(eq=False, slots=True)
 class Continue(BaseNode):
     pass
-
-
-AST_CLASS_MAP: Dict[str, Type[BaseNode]] = {
-    cls.__name__: cls
-    for cls in list(globals().values())
-    if isinstance(cls, type) and issubclass(cls, BaseNode)
-}
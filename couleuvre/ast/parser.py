@@ -1,10 +1,17 @@
+import hashlib
 import json
 import logging
-import tempfile
-from pathlib import Path
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import MISSING, fields
+from functools import lru_cache
+from sys import intern
 from textwrap import dedent
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import orjson
 from packaging.version import Version
 
 from couleuvre.ast.environment import resolve_environment
@@ -20,48 +27,302 @@ _AST_TYPE_ALIASES = {
 }
 
 
-def get_script(
-    file_path: str,
+# Placeholder argument for the fields whose default is built by a factory
+_FACTORY_DEFAULT = object()
+
+# Identifier fields whose few distinct values repeat across thousands of nodes;
+# interned so that nodes share one string per name
+_INTERNED_FIELDS = frozenset({"ast_type", "id", "attr", "arg", "name"})
+
+
+def _class_info(
+    ast_type: str,
+) -> Tuple[
+    type,
+    Dict[str, int],
+    tuple,
+    Tuple[Tuple[int, Callable[[], Any]], ...],
+    Tuple[int, ...],
+]:
+    """
+    Resolve the node class of an AST type, along with what the converter
+    needs to call its constructor positionally: the argument index of each
+    field, the default arguments, the fields built by a default factory and
+    the fields whose strings are interned.
+    """
+    cls = AST_CLASS_MAP.get(ast_type, BaseNode)
+    indexes: Dict[str, int] = {}
+    defaults: List[Any] = []
+    factories: List[Tuple[int, Callable[[], Any]]] = []
+    interned: List[int] = []
+    for index, f in enumerate(fields(cls)):
+        indexes[f.name] = index
+        if f.name in _INTERNED_FIELDS:
+            interned.append(index)
+        if f.default_factory is not MISSING:
+            defaults.append(_FACTORY_DEFAULT)
+            factories.append((index, f.default_factory))
+        else:
+            defaults.append(None if f.default is MISSING else f.default)
+    return cls, indexes, tuple(defaults), tuple(factories), tuple(interned)
+
+
+# Constructor information per Vyper AST type, resolved once at import
+_CLS_INFO = {ast_type: _class_info(ast_type) for ast_type in AST_CLASS_MAP}
+_CLS_INFO.update(
+    {vyper_type: _class_info(alias) for vyper_type, alias in _AST_TYPE_ALIASES.items()}
+)
+_BASE_INFO = _CLS_INFO["BaseNode"]
+
+# orjson silently decodes integers wider than 64 bits as floats, and uint256
+# literals are common in Vyper sources. Payloads containing such a literal are
+# decoded with the stdlib parser instead (false positives only cost speed).
+_WIDE_INT_PATTERN = re.compile(rb"\d{19}")
+
+# Appended to the generated scripts: writes the object bound to `output` as
+# compact JSON bytes. orjson is only available when the target environment
+# happens to provide it, and it refuses integers wider than 64 bits.
+_EMIT_AST = dedent(
+    """
+    import sys
+    try:
+        import orjson
+        payload = orjson.dumps(output)
+    except (ImportError, TypeError):
+        payload = json.dumps(output, separators=(",", ":")).encode()
+    sys.stdout.buffer.write(payload)
+    """
+)
+
+
+# Maximum number of files whose parsed AST is kept in memory
+AST_CACHE_SIZE = 64
+
+# Parsed ASTs by file path, each stored alongside the key it was parsed with:
+# ((mtime_ns, size), vyper_version, search_paths, cwd, source digest). Only
+# the latest parse of a file is kept, so an edit or a newer mtime replaces it.
+_ast_cache: "OrderedDict[str, Tuple[tuple, Module]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _ast_cache_key(
+    path: str,
     vyper_version: str,
     search_paths: list[str],
-    source: Optional[str] = None,
-) -> str:
-    if Version(vyper_version) < Version("0.4.1"):
-        # For older versions, we can pass source directly to CompilerData
+    workspace_path: Optional[str],
+    source: Optional[str],
+) -> tuple:
+    """Build the key under which the AST of a file is cached."""
+    try:
+        stat = os.stat(path)
+        file_state: Optional[Tuple[int, int]] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        file_state = None
+    digest = hashlib.sha1(source.encode()).hexdigest() if source is not None else None
+    return (file_state, vyper_version, tuple(search_paths), workspace_path, digest)
+
+
+def _get_cached_ast(path: str, key: tuple) -> Optional[Module]:
+    """Return the cached AST for a file if it was parsed with the same key."""
+    with _cache_lock:
+        entry = _ast_cache.get(path)
+        if entry is None or entry[0] != key:
+            return None
+        _ast_cache.move_to_end(path)
+        return entry[1]
+
+
+def _store_cached_ast(path: str, key: tuple, module: Module) -> None:
+    """Cache the AST of a file, evicting the least recently used entries."""
+    with _cache_lock:
+        _ast_cache[path] = (key, module)
+        _ast_cache.move_to_end(path)
+        while len(_ast_cache) > AST_CACHE_SIZE:
+            _ast_cache.popitem(last=False)
+
+
+def clear_ast_cache() -> None:
+    """Drop all cached ASTs."""
+    with _cache_lock:
+        _ast_cache.clear()
+
+
+def _decode_ast_payload(payload: bytes) -> Dict[str, Any]:
+    """Decode the JSON AST emitted by the Vyper subprocess."""
+    if _WIDE_INT_PATTERN.search(payload):
+        return json.loads(payload)
+    return orjson.loads(payload)
+
+
+@lru_cache(maxsize=None)
+def _uses_input_bundle(vyper_version: str) -> bool:
+    """Whether a Vyper version parses files through FilesystemInputBundle."""
+    return Version(vyper_version) >= Version("0.4.1")
+
+
+# The extraction scripts are static: their inputs are passed as the `args`
+# global of the worker request, so each worker compiles every script once.
+# For versions before 0.4.1, the source is passed directly to CompilerData.
+_LEGACY_AST_SCRIPT = (
+    dedent(
+        """
+        import json
+        from pathlib import Path
+        from vyper.compiler import CompilerData
+
+        source = args["source"]
         if source is None:
-            source = Path(file_path).read_text()
-        return dedent(
-            f"""
-            import json
-            from vyper.compiler import CompilerData
-
-            data = CompilerData({json.dumps(source)}).vyper_module
-            print(json.dumps(data.to_dict()))
-            """
-        )
+            source = Path(args["file_path"]).read_text()
+        output = CompilerData(source).vyper_module.to_dict()
+        """
+    )
+    + _EMIT_AST
+)
+
+# Defines BufferInputBundle, a FilesystemInputBundle (Vyper >= 0.4.0) serving
+# an unsaved buffer from memory in place of the file on disk
+BUFFER_INPUT_BUNDLE_SCRIPT = dedent(
+    """
+    from pathlib import Path
+    from vyper.compiler.input_bundle import FileInput, FilesystemInputBundle
 
-    # For version >= 0.4.1, we need to use FilesystemInputBundle which reads from disk.
-    # If source is provided, we'll write it to a temp file and use that path.
-    return dedent(
-        f"""
+    class BufferInputBundle(FilesystemInputBundle):
+        def __init__(self, search_paths, buffers):
+            super().__init__(search_paths)
+            # Unsaved sources by resolved path, None meaning the file on disk
+            self.buffers = {
+                Path(path).resolve(): source
+                for path, source in buffers.items()
+                if source is not None
+            }
+
+        def _normalize_path(self, path):
+            resolved_path = path.resolve()
+            if resolved_path in self.buffers:
+                return resolved_path
+            return super()._normalize_path(path)
+
+        def _load_from_path(self, resolved_path, original_path):
+            source = self.buffers.get(resolved_path)
+            if source is not None:
+                source_id = self._generate_source_id(resolved_path)
+                return FileInput(source_id, original_path, resolved_path, source)
+            return super()._load_from_path(resolved_path, original_path)
+    """
+)
+
+# For version >= 0.4.1, imports are resolved through FilesystemInputBundle.
+# An unsaved buffer is served from memory in place of the file on disk.
+_AST_SCRIPT = (
+    BUFFER_INPUT_BUNDLE_SCRIPT
+    + dedent(
+        """
         import json
         from pathlib import Path
         from vyper.compiler import CompilerData
-        from vyper.compiler.input_bundle import FilesystemInputBundle
         from vyper.semantics.analysis.imports import resolve_imports
 
-        search_paths = [Path(p) for p in {json.dumps(search_paths)}]
-        input_bundle = FilesystemInputBundle(search_paths)
-        file = input_bundle.load_file({json.dumps(file_path)})
+        search_paths = [Path(p) for p in args["search_paths"]]
+        input_bundle = BufferInputBundle(
+            search_paths, {args["file_path"]: args["source"]}
+        )
+        file = input_bundle.load_file(args["file_path"])
         module = CompilerData(file, input_bundle).vyper_module
         try:
             with input_bundle.search_path(Path(module.resolved_path).parent):
                 resolve_imports(module, input_bundle)
         except Exception:
             pass
-        print(json.dumps(module.to_dict()))
+        output = module.to_dict()
+        """
+    )
+    + _EMIT_AST
+)
+
+# Batch variants: output {"asts": {path: ast}, "errors": {path: message}}
+_LEGACY_BATCH_SCRIPT = (
+    dedent(
+        """
+        import json
+        from pathlib import Path
+        from vyper.compiler import CompilerData
+
+        output = {"asts": {}, "errors": {}}
+        for path in args["file_paths"]:
+            try:
+                data = CompilerData(Path(path).read_text()).vyper_module
+                output["asts"][path] = data.to_dict()
+            except Exception as e:
+                output["errors"][path] = f"{type(e).__name__}: {e}"
         """
     )
+    + _EMIT_AST
+)
+
+_BATCH_SCRIPT = (
+    dedent(
+        """
+        import json
+        from pathlib import Path
+        from vyper.compiler import CompilerData
+        from vyper.compiler.input_bundle import FilesystemInputBundle
+        from vyper.semantics.analysis.imports import resolve_imports
+
+        search_paths = [Path(p) for p in args["search_paths"]]
+        input_bundle = FilesystemInputBundle(search_paths)
+        output = {"asts": {}, "errors": {}}
+        for path in args["file_paths"]:
+            try:
+                file = input_bundle.load_file(path)
+                module = CompilerData(file, input_bundle).vyper_module
+            except Exception as e:
+                output["errors"][path] = f"{type(e).__name__}: {e}"
+                continue
+            try:
+                with input_bundle.search_path(Path(module.resolved_path).parent):
+                    resolve_imports(module, input_bundle)
+            except Exception:
+                pass
+            output["asts"][path] = module.to_dict()
+        """
+    )
+    + _EMIT_AST
+)
+
+
+def get_script(
+    file_path: str,
+    vyper_version: str,
+    search_paths: list[str],
+    source: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the script extracting the AST of a file, along with its arguments.
+
+    The script only depends on the Vyper version; the file path, search paths
+    and unsaved source are passed as the worker request's arguments.
+    """
+    script = _AST_SCRIPT if _uses_input_bundle(vyper_version) else _LEGACY_AST_SCRIPT
+    args = {"file_path": file_path, "search_paths": search_paths, "source": source}
+    return script, args
+
+
+def get_batch_script(
+    file_paths: List[str],
+    vyper_version: str,
+    search_paths: list[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the script extracting the ASTs of several files in one run, along
+    with its arguments.
+
+    The script outputs {"asts": {path: ast}, "errors": {path: message}}.
+    """
+    if _uses_input_bundle(vyper_version):
+        script = _BATCH_SCRIPT
+    else:
+        script = _LEGACY_BATCH_SCRIPT
+    return script, {"file_paths": file_paths, "search_paths": search_paths}
 
 
 def get_json_ast(
@@ -73,37 +334,21 @@ def get_json_ast(
     env = resolve_environment(vyper_version)
     search_paths = env.get_search_paths(include_sys_path=True)
 
-    # For Vyper >= 0.4.1 with unsaved buffer, write to a temp file
-    # so FilesystemInputBundle can read it
-    temp_file = None
-    effective_path = path
-    if source is not None and Version(vyper_version) >= Version("0.4.1"):
-        # Create temp file with same extension to preserve file type detection
-        suffix = Path(path).suffix or ".vy"
-        temp_file = tempfile.NamedTemporaryFile(
-            mode="w", suffix=suffix, delete=False, dir=Path(path).parent
-        )
-        temp_file.write(source)
-        temp_file.close()
-        effective_path = temp_file.name
+    cache_key = _ast_cache_key(
+        path, vyper_version, search_paths, workspace_path, source
+    )
+    cached = _get_cached_ast(path, cache_key)
+    if cached is not None:
+        logger.debug("Using cached AST for %s", path)
+        return cached
 
-    try:
-        script = get_script(effective_path, vyper_version, search_paths, source)
-        result = env.run_script(script, cwd=workspace_path)
-    finally:
-        # Clean up temp file if we created one
-        if temp_file is not None:
-            try:
-                Path(temp_file.name).unlink()
-            except OSError:
-                pass
+    script, args = get_script(path, vyper_version, search_paths, source)
+    result = env.run_worker_script(script, cwd=workspace_path, args=args)
 
     if result.returncode != 0:
-        error_message = result.stderr.strip() or "Unknown error"
-        # Replace temp file name with original path in error messages
-        if temp_file is not None:
-            temp_name = Path(temp_file.name).name
-            error_message = error_message.replace(temp_name, Path(path).name)
+        error_message = (
+            result.stderr.decode(errors="replace").strip() or "Unknown error"
+        )
         logger.error(
             "Failed to get AST for Vyper %s: subprocess error: %s",
             vyper_version,
@@ -114,14 +359,89 @@ def get_json_ast(
     logger.info("Got Vyper AST from Vyper %s", vyper_version)
 
     try:
-        parsed_json = json.loads(result.stdout)
+        parsed_json = _decode_ast_payload(result.stdout)
     except json.JSONDecodeError as exc:
         logger.error("Failed to parse AST output for Vyper %s: %s", vyper_version, exc)
         raise
-    lsp_ast = _from_vyper_json_ast(parsed_json)
+    # Release the raw payload before building the nodes
+    del result
+    lsp_ast = _to_module(parsed_json)
+    logger.info("Parsed Vyper AST to LSP AST")
+    _store_cached_ast(path, cache_key, lsp_ast)
+    return lsp_ast
+
+
+def get_json_asts(
+    paths: List[str],
+    vyper_version: str,
+    workspace_path: Optional[str] = None,
+) -> Dict[str, Module]:
+    """
+    Get the ASTs of several files on disk with a single worker round-trip.
+
+    Args:
+        paths: Paths of the Vyper source files.
+        vyper_version: The Vyper version to parse them with.
+        workspace_path: Root path for resolving relative imports.
+
+    Returns:
+        Mapping of path to parsed Module node. Files that failed to parse
+        are left out.
+
+    Raises:
+        RuntimeError: If the Vyper subprocess itself failed.
+    """
+    env = resolve_environment(vyper_version)
+    search_paths = env.get_search_paths(include_sys_path=True)
+
+    modules: Dict[str, Module] = {}
+    cache_keys: Dict[str, tuple] = {}
+    for path in dict.fromkeys(paths):
+        cache_key = _ast_cache_key(
+            path, vyper_version, search_paths, workspace_path, None
+        )
+        cached = _get_cached_ast(path, cache_key)
+        if cached is not None:
+            modules[path] = cached
+        else:
+            cache_keys[path] = cache_key
+
+    if not cache_keys:
+        return modules
+
+    script, args = get_batch_script(list(cache_keys), vyper_version, search_paths)
+    result = env.run_worker_script(script, cwd=workspace_path, args=args)
+    if result.returncode != 0:
+        error_message = (
+            result.stderr.decode(errors="replace").strip() or "Unknown error"
+        )
+        logger.error(
+            "Failed to get ASTs for Vyper %s: subprocess error: %s",
+            vyper_version,
+            error_message,
+        )
+        raise RuntimeError(error_message)
+
+    output = _decode_ast_payload(result.stdout)
+    del result
+    for path, message in output["errors"].items():
+        logger.debug("Failed to get AST of %s: %s", path, message)
+    for path, ast_dict in output["asts"].items():
+        lsp_ast = _to_module(ast_dict)
+        _store_cached_ast(path, cache_keys[path], lsp_ast)
+        modules[path] = lsp_ast
+
+    logger.info(
+        "Parsed %d Vyper ASTs with Vyper %s", len(output["asts"]), vyper_version
+    )
+    return modules
+
+
+def _to_module(ast_dict: Dict[str, Any]) -> Module:
+    """Convert the JSON AST of a file into its Module node."""
+    lsp_ast = _from_vyper_json_ast(ast_dict)
     if not isinstance(lsp_ast, Module):
         raise TypeError("Expected AST root to be a Module node")
-    logger.info("Parsed Vyper AST to LSP AST")
     return lsp_ast
 
 
@@ -131,39 +451,86 @@ def get_json_ast(
 def _from_vyper_json_ast(
     ast_dict: Dict[str, Any], parent: Optional[BaseNode] = None
 ) -> BaseNode:
-    def _convert_child(value: Any) -> Any:
+    """
+    Convert a Vyper JSON AST into LSP AST nodes.
+
+    The tree is walked iteratively so that deeply nested ASTs cannot hit the
+    recursion limit. Node dicts are first collected in pre-order; converting
+    them in reverse order guarantees every child is built before its parent.
+
+    ast_dict is consumed: each node dict is emptied once converted, so the
+    memory held by the JSON tree is released while the nodes are built.
+    """
+    order: List[Dict[str, Any]] = []
+    pending: List[Any] = [ast_dict]
+    while pending:
+        value = pending.pop()
         if isinstance(value, list):
-            return [_convert_child(item) for item in value]
-        if isinstance(value, dict) and "ast_type" in value:
-            return _from_vyper_json_ast(value)
-        return value
-
-    ast_type = _AST_TYPE_ALIASES.get(ast_dict["ast_type"])
-    if ast_type is None:
-        ast_type = ast_dict["ast_type"]
-    cls = AST_CLASS_MAP.get(ast_type, BaseNode)
-    cls_fields = cls.__dataclass_fields__
-
-    kwargs = {"ast_type": ast_type}
-
-    for key, value in ast_dict.items():
-        if key not in cls_fields:
-            logger.error(
-                f"Key '{str(key)}' not found in {str(cls.__name__)} dataclass fields"
-            )
-            continue
-        kwargs[key] = _convert_child(value)
-    # TODO sus type ignore
-    node = cls(**kwargs)  # type: ignore
-    node.parent = parent
-
-    # Now update children with the correct parent reference
-    for key, value in kwargs.items():
-        if isinstance(value, BaseNode):
-            value.parent = node
-        elif isinstance(value, list):
-            for item in value:
-                if isinstance(item, BaseNode):
-                    item.parent = node
-
-    return node
+            pending.extend(value)
+        elif isinstance(value, dict) and "ast_type" in value:
+            order.append(value)
+            pending.extend(value.values())
+
+    # Nodes converted but not yet attached to their parent, by id of their dict
+    converted: Dict[int, BaseNode] = {}
+    while order:
+        node_dict = order.pop()
+        cls, indexes, defaults, factories, interned = _CLS_INFO.get(
+            node_dict["ast_type"], _BASE_INFO
+        )
+        args = list(defaults)
+        children: List[BaseNode] = []
+
+        for key, value in node_dict.items():
+            index = indexes.get(key)
+            if index is None:
+                logger.error(
+                    f"Key '{str(key)}' not found in {str(cls.__name__)} dataclass fields"
+                )
+                continue
+            if isinstance(value, dict):
+                child = converted.pop(id(value), None)
+                if child is not None:
+                    value = child
+                    children.append(child)
+            elif isinstance(value, list):
+                value = _convert_list(value, converted, children)
+            args[index] = value
+        for index, factory in factories:
+            if args[index] is _FACTORY_DEFAULT:
+                args[index] = factory()
+        for index in interned:
+            value = args[index]
+            if value.__class__ is str:
+                args[index] = intern(value)
+        node = cls(*args)
+        converted[id(node_dict)] = node
+        node_dict.clear()
+
+        for child in children:
+            child.parent = node
+
+    root = converted.pop(id(ast_dict))
+    if parent is not None:
+        root.parent = parent
+    return root
+
+
+def _convert_list(
+    items: List[Any], converted: Dict[int, BaseNode], children: List[BaseNode]
+) -> List[Any]:
+    """
+    Replace the node dicts of a (possibly nested) list by their converted
+    nodes, collecting those nodes into children.
+    """
+    result = []
+    for item in items:
+        if isinstance(item, dict):
+            child = converted.pop(id(item), None)
+            if child is not None:
+                item = child
+                children.append(child)
+        elif isinstance(item, list):
+            item = _convert_list(item, converted, children)
+        result.append(item)
+    return result
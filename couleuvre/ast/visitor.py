@@ -6,7 +6,8 @@ the symbol table with all definitions and their access patterns.
 """
 
 import logging
-from typing import TYPE_CHECKING, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Optional
 
 from lsprotocol.types import SymbolKind
 
@@ -22,6 +23,19 @@ if TYPE_CHECKING:
 logger = logging.getLogger("couleuvre")
 
 
+@lru_cache(maxsize=None)
+def _dispatch_table(visitor_cls: type) -> Dict[type, Callable]:
+    """Map each AST node class to the visit_* method of a visitor class."""
+    table: Dict[type, Callable] = {}
+    for attr in dir(visitor_cls):
+        if not attr.startswith("visit_"):
+            continue
+        node_cls = getattr(nodes, attr[len("visit_") :], None)
+        if isinstance(node_cls, type):
+            table[node_cls] = getattr(visitor_cls, attr)
+    return table
+
+
 class VyperAstVisitor:
     """
     Visitor that extracts namespace information from a Vyper AST.
@@ -35,15 +49,15 @@ class VyperAstVisitor:
     def __init__(self, module: "Module"):
         self.module = module
         self._current_function: Optional[nodes.FunctionDef] = None
+        self._dispatch = _dispatch_table(type(self))
 
     def visit(self, node: nodes.BaseNode) -> None:
         """Visit a node by dispatching to the appropriate visit method."""
-        node_type = type(node).__name__
-        visitor_fn = getattr(self, f"visit_{node_type}", None)
+        visitor_fn = self._dispatch.get(type(node))
         if visitor_fn is None:
-            logger.debug(f"No visitor for node type: {node_type}")
+            logger.debug("No visitor for node type: %s", type(node).__name__)
             return
-        visitor_fn(node)
+        visitor_fn(self, node)
 
     def _add_symbol(
         self,
@@ -108,22 +122,22 @@ class VyperAstVisitor:
         self._current_function = node
 
         # Visit function body to collect local variables
-        for child in node.body:
-            local_entries = self._visit_function_body_node(child, node)
-            children.extend(local_entries)
+        children.extend(self._visit_function_body(node.body, node))
 
         self._current_function = None
 
         # Add the function itself
         self._add_symbol(node.name, node, SymbolKind.Function, children=children)
 
-    def _visit_function_body_node(
-        self, node: nodes.BaseNode, func: nodes.FunctionDef
+    def _visit_function_body(
+        self, body: list, func: nodes.FunctionDef
     ) -> list[SymbolEntry]:
         """
-        Visit a node in a function body and collect local variable definitions.
+        Visit the statements of a function body and collect local variable
+        definitions, descending into for loops and if/else blocks.
 
-        Returns list of SymbolEntry for any local variables found.
+        Returns list of SymbolEntry for any local variables found, in
+        source order.
         """
         entries: list[SymbolEntry] = []
 
@@ -131,59 +145,56 @@ class VyperAstVisitor:
         if not func.name:
             return entries
 
-        if isinstance(node, nodes.AnnAssign):
-            # Local variable declaration: x: uint256 = ...
-            if hasattr(node, "target") and hasattr(node.target, "id"):
-                entry = SymbolEntry(
-                    name=node.target.id,
-                    node=node,
-                    kind=SymbolKind.Variable,
-                    scope=func.name,
-                    access_patterns=[([node.target.id], False)],
-                    parent_function=func,
-                )
-                self.module.symbol_table.add(entry)
-                entries.append(entry)
-
-        elif isinstance(node, nodes.For):
-            # For loop iterator: for i: uint256 in range(10)
-            # The target is the loop variable (can be AnnAssign or Name)
-            if isinstance(node.target, nodes.AnnAssign):
-                if hasattr(node.target, "target") and hasattr(node.target.target, "id"):
-                    # Use the inner Name node (node.target.target) for better location info
-                    target_name = node.target.target
+        # Statements still to visit, next one last
+        stack = list(reversed(body))
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, nodes.AnnAssign):
+                # Local variable declaration: x: uint256 = ...
+                if hasattr(node, "target") and hasattr(node.target, "id"):
                     entry = SymbolEntry(
-                        name=target_name.id,
-                        node=target_name,
+                        name=node.target.id,
+                        node=node,
                         kind=SymbolKind.Variable,
                         scope=func.name,
-                        access_patterns=[([target_name.id], False)],
+                        access_patterns=[([node.target.id], False)],
                         parent_function=func,
                     )
                     self.module.symbol_table.add(entry)
                     entries.append(entry)
-            elif isinstance(node.target, nodes.Name):
-                entry = SymbolEntry(
-                    name=node.target.id,
-                    node=node.target,
-                    kind=SymbolKind.Variable,
-                    scope=func.name,
-                    access_patterns=[([node.target.id], False)],
-                    parent_function=func,
-                )
-                self.module.symbol_table.add(entry)
-                entries.append(entry)
 
-            # Recursively visit for loop body
-            for child in node.body:
-                entries.extend(self._visit_function_body_node(child, func))
+            elif isinstance(node, nodes.For):
+                # For loop iterator: for i: uint256 in range(10)
+                # The target is the loop variable (can be AnnAssign or Name)
+                target = node.target
+                if isinstance(target, nodes.AnnAssign):
+                    if hasattr(target, "target") and hasattr(target.target, "id"):
+                        # Use the inner Name node (target.target) for better location info
+                        target = target.target
+                    else:
+                        target = None
+                elif not isinstance(target, nodes.Name):
+                    target = None
+                if target is not None:
+                    entry = SymbolEntry(
+                        name=target.id,
+                        node=target,
+                        kind=SymbolKind.Variable,
+                        scope=func.name,
+                        access_patterns=[([target.id], False)],
+                        parent_function=func,
+                    )
+                    self.module.symbol_table.add(entry)
+                    entries.append(entry)
 
-        elif isinstance(node, nodes.If):
-            # Recursively visit if/else bodies
-            for child in node.body:
-                entries.extend(self._visit_function_body_node(child, func))
-            for child in node.orelse:
-                entries.extend(self._visit_function_body_node(child, func))
+                # Visit for loop body
+                stack.extend(reversed(node.body))
+
+            elif isinstance(node, nodes.If):
+                # Visit if body, then else body
+                stack.extend(reversed(node.orelse))
+                stack.extend(reversed(node.body))
 
         return entries
 
@@ -259,15 +270,16 @@ class VyperAstVisitor:
     def _handle_import(self, node: nodes.BaseNode) -> None:
         if not isinstance(node, (nodes.Import, nodes.ImportFrom)):
             return
-        resolved_path = (
-            node.import_info.get("resolved_path") if node.import_info else None
-        )
+        import_info = node.import_info
+        resolved_path = import_info.get("resolved_path") if import_info else None
         if resolved_path is None:
             return
-        if node.alias:
-            self.module.imports[node.alias] = resolved_path
-        if node.name:
-            self.module.imports[node.name] = resolved_path
+        imports = self.module.imports
+        alias, name = node.alias, node.name
+        if alias:
+            imports[alias] = resolved_path
+        if name:
+            imports[name] = resolved_path
 
     def visit_Import(self, node: nodes.Import) -> None:
         self._handle_import(node)
@@ -1,23 +1,43 @@
+import logging
 import os
+import shutil
 import subprocess
+import threading
+from functools import lru_cache
 from pathlib import Path
 from packaging.version import Version
 
+logger = logging.getLogger("couleuvre")
+
 VYPER_BASE_DIR = Path.home() / ".couleuvre" / "venvs"
 
+# Serializes environment creation, which parallel parses may request at once
+_install_lock = threading.Lock()
+
 
 def _get_venv_path(version: str) -> Path:
     return VYPER_BASE_DIR / version
 
 
+# Python version for each range of Vyper versions, by newest Vyper version
+_PY_VERSION_BY_VY_VERSION = ((Version("0.2.7"), "3.8"), (Version("0.3.2"), "3.9"))
+_DEFAULT_PY_VERSION = "3.10"
+
+
+@lru_cache(maxsize=None)
 def _get_py_version_for_vy_version(vy_version: str) -> str:
     vy_ver = Version(vy_version)
 
-    if vy_ver <= Version("0.2.7"):
-        return "3.8"
-    if vy_ver <= Version("0.3.2"):
-        return "3.9"
-    return "3.10"
+    for newest_vy_version, py_version in _PY_VERSION_BY_VY_VERSION:
+        if vy_ver <= newest_vy_version:
+            return py_version
+    return _DEFAULT_PY_VERSION
+
+
+@lru_cache(maxsize=None)
+def _get_uv_bin() -> str:
+    """Get the path to the uv executable, looked up on PATH once."""
+    return shutil.which("uv") or "uv"
 
 
 def _get_venv_python(venv_path: Path) -> str:
@@ -25,45 +45,60 @@ def _get_venv_python(venv_path: Path) -> str:
     return str(venv_path / "bin" / "python")
 
 
+def is_vyper_version_installed(version: str) -> bool:
+    """Check if a uv-managed virtual environment exists for a vyper version."""
+    return _get_venv_path(version).exists()
+
+
+@lru_cache(maxsize=None)
 def ensure_vyper_version(version: str) -> Path:
     """
     Ensure the specified vyper version is available in a uv-managed virtual environment.
     Returns the path to the virtual environment.
+
+    The result is memoized: once a venv is available, it is assumed to stay so
+    for the lifetime of the process.
     """
     venv_path = _get_venv_path(version)
 
-    if not venv_path.exists():
-        print(f"[couleuvre] Creating uv env for vyper {version}...")
-
-        py_version = _get_py_version_for_vy_version(version)
-        # Create the environment using uv
-        subprocess.run(
-            ["uv", "venv", "--python", py_version, str(venv_path)],
-            check=True,
-        )
-
-        venv_python = _get_venv_python(venv_path)
-        env = os.environ.copy()
-        env["VIRTUAL_ENV"] = str(venv_path)
-
-        subprocess.run(
-            [
-                "uv",
-                "pip",
-                "install",
-                "--python",
-                venv_python,
-                "--upgrade",
-                "setuptools",
-            ],
-            env=env,
-            check=True,
-        )
-        # Install vyper
-        subprocess.run(
-            ["uv", "pip", "install", "--python", venv_python, f"vyper=={version}"],
-            env=env,
-            check=True,
-        )
+    with _install_lock:
+        if not venv_path.exists():
+            _create_venv(version, venv_path)
 
     return venv_path
+
+
+def _create_venv(version: str, venv_path: Path) -> None:
+    """Create a uv virtual environment with the given vyper version installed."""
+    # stdout may be the LSP stream, so neither this nor uv may write to it
+    logger.info("Creating uv env for vyper %s...", version)
+
+    py_version = _get_py_version_for_vy_version(version)
+    uv_bin = _get_uv_bin()
+    # Create the environment using uv
+    subprocess.run(
+        [uv_bin, "venv", "--python", py_version, str(venv_path)],
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+    venv_python = _get_venv_python(venv_path)
+    env = os.environ.copy()
+    env["VIRTUAL_ENV"] = str(venv_path)
+
+    # Install setuptools and vyper in a single resolution
+    subprocess.run(
+        [
+            uv_bin,
+            "pip",
+            "install",
+            "--python",
+            venv_python,
+            "--upgrade",
+            "setuptools",
+            f"vyper=={version}",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
@@ -0,0 +1,293 @@
+"""
+Long-lived Vyper worker processes.
+
+Spawning a fresh interpreter and importing Vyper costs a few hundred
+milliseconds per request. Workers are started on demand for each Python
+interpreter and run the scripts they receive in-process, so the Vyper import
+is paid only once per worker. Concurrent requests are spread over a small
+pool of workers.
+
+Wire format (all frames are length-prefixed, newline-terminated headers):
+- request:  b"<len>\\n" followed by a JSON object
+  {"script": ..., "cwd": ..., "args": ...}; args is bound to the `args`
+  global of the script, so that scripts can stay identical across requests
+  and be compiled once per worker
+- response: b"<returncode> <stdout_len> <stderr_len>\\n" followed by the
+  captured stdout and stderr bytes
+"""
+
+import atexit
+import logging
+import os
+import subprocess
+import threading
+from textwrap import dedent
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+logger = logging.getLogger("couleuvre")
+
+# Maximum number of concurrent workers per Python interpreter
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Runs inside the target interpreter, so it may only use the standard library.
+# The protocol goes over a duplicate of the original stdout; fd 1 is pointed
+# at stderr so that stray writes (e.g. from C extensions) cannot corrupt it.
+_WORKER_SCRIPT = dedent(
+    """
+    import io
+    import json
+    import os
+    import sys
+    import traceback
+
+    requests = sys.stdin.buffer
+    responses = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    initial_cwd = os.getcwd()
+    compiled = {}
+
+    while True:
+        header = requests.readline()
+        if not header:
+            break
+        request = json.loads(requests.read(int(header)))
+
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        stderr = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        saved_streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = stdout, stderr
+        returncode = 0
+        try:
+            os.chdir(request.get("cwd") or initial_cwd)
+            script = request["script"]
+            code = compiled.get(script)
+            if code is None:
+                if len(compiled) >= 32:
+                    compiled.clear()
+                code = compiled[script] = compile(script, "<couleuvre>", "exec")
+            exec(code, {"__name__": "__main__", "args": request.get("args")})
+        except SystemExit as exc:
+            if isinstance(exc.code, int):
+                returncode = exc.code
+            elif exc.code is not None:
+                stderr.write(str(exc.code))
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            sys.stdout, sys.stderr = saved_streams
+
+        stdout.flush()
+        stderr.flush()
+        out = stdout.buffer.getvalue()
+        err = stderr.buffer.getvalue()
+        responses.write(b"%d %d %d\\n" % (returncode, len(out), len(err)))
+        responses.write(out)
+        responses.write(err)
+        responses.flush()
+    """
+)
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker process dies or violates the wire format."""
+
+
+class VyperWorker:
+    """
+    A persistent interpreter that executes scripts sent over its stdin.
+
+    Requests are serialized: a worker runs one script at a time.
+    """
+
+    def __init__(self, python_bin: str, env: Optional[Dict[str, str]] = None):
+        self.python_bin = python_bin
+        self.env = env
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        process = self._process
+        if process is None or process.poll() is not None:
+            logger.info("Starting Vyper worker for %s", self.python_bin)
+            process = subprocess.Popen(
+                [self.python_bin, "-c", _WORKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=self.env,
+            )
+            self._process = process
+        return process
+
+    def _request(
+        self, script: str, cwd: Optional[str], args: Optional[Dict[str, Any]]
+    ) -> subprocess.CompletedProcess:
+        process = self._ensure_started()
+        assert process.stdin is not None and process.stdout is not None
+
+        body = orjson.dumps({"script": script, "cwd": cwd, "args": args})
+        try:
+            process.stdin.write(b"%d\n" % len(body))
+            process.stdin.write(body)
+            process.stdin.flush()
+            header = process.stdout.readline()
+        except (BrokenPipeError, OSError) as exc:
+            raise WorkerError(f"Vyper worker stopped: {exc}") from exc
+
+        try:
+            returncode, out_len, err_len = (int(part) for part in header.split())
+        except ValueError:
+            raise WorkerError(f"Malformed Vyper worker response: {header!r}") from None
+
+        stdout = process.stdout.read(out_len)
+        stderr = process.stdout.read(err_len)
+        if len(stdout) != out_len or len(stderr) != err_len:
+            raise WorkerError("Vyper worker stopped while sending a response")
+        return subprocess.CompletedProcess(
+            [self.python_bin, "-c", script], returncode, stdout, stderr
+        )
+
+    def run(
+        self,
+        script: str,
+        cwd: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        Run a Python script in the worker.
+
+        The worker is (re)started on demand. If it dies mid-request, the
+        request is retried once in a fresh worker before giving up.
+
+        Args:
+            script: The Python script to execute
+            cwd: Working directory for the script
+            args: JSON-serializable arguments, bound to `args` in the script
+
+        Returns:
+            The completed process result, with stdout and stderr as bytes
+
+        Raises:
+            WorkerError: If the worker failed twice in a row.
+        """
+        with self._lock:
+            try:
+                return self._request(script, cwd, args)
+            except WorkerError as exc:
+                logger.warning(
+                    "Restarting Vyper worker for %s: %s", self.python_bin, exc
+                )
+                self._terminate()
+            try:
+                return self._request(script, cwd, args)
+            except WorkerError:
+                self._terminate()
+                raise
+
+    def _terminate(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if process.stdin is not None:
+                process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        with self._lock:
+            self._terminate()
+
+
+class WorkerPool:
+    """
+    Workers sharing one Python interpreter.
+
+    Each request goes to an idle worker; new workers are spawned on demand,
+    up to max_workers, after which requests wait for a worker to free up.
+    """
+
+    def __init__(
+        self,
+        python_bin: str,
+        max_workers: int = MAX_WORKERS,
+        env: Optional[Dict[str, str]] = None,
+    ):
+        self.python_bin = python_bin
+        self.env = env
+        self.max_workers = max_workers
+        self._workers: List[VyperWorker] = []
+        self._idle: List[VyperWorker] = []
+        self._available = threading.Condition()
+
+    def _acquire(self) -> VyperWorker:
+        with self._available:
+            while not self._idle and len(self._workers) >= self.max_workers:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            worker = VyperWorker(self.python_bin, env=self.env)
+            self._workers.append(worker)
+            return worker
+
+    def _release(self, worker: VyperWorker) -> None:
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def run(
+        self,
+        script: str,
+        cwd: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run a Python script in an idle worker. See VyperWorker.run."""
+        worker = self._acquire()
+        try:
+            return worker.run(script, cwd=cwd, args=args)
+        finally:
+            self._release(worker)
+
+    def close(self) -> None:
+        """Stop all worker processes of the pool."""
+        with self._available:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.close()
+
+
+_pools: Dict[str, WorkerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(
+    python_bin: str, env: Optional[Dict[str, str]] = None
+) -> WorkerPool:
+    """
+    Get the shared worker pool for a Python interpreter, creating it if needed.
+
+    env only applies to a newly created pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(python_bin)
+        if pool is None:
+            pool = _pools[python_bin] = WorkerPool(python_bin, env=env)
+        return pool
+
+
+def shutdown_workers() -> None:
+    """Stop all worker processes."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(shutdown_workers)
@@ -23,6 +23,23 @@ logger = logging.getLogger("couleuvre")
 # Pattern to match trigger context: "self." or "<identifier>."
 _TRIGGER_PATTERN = re.compile(r"([A-Za-z_][A-Za-z_0-9]*)\.$")
 
+# Completion item kind of each symbol kind
+_COMPLETION_KINDS = {
+    types.SymbolKind.Function: CompletionItemKind.Function,
+    types.SymbolKind.Method: CompletionItemKind.Method,
+    types.SymbolKind.Variable: CompletionItemKind.Variable,
+    types.SymbolKind.Constant: CompletionItemKind.Constant,
+    types.SymbolKind.Field: CompletionItemKind.Field,
+    types.SymbolKind.Struct: CompletionItemKind.Struct,
+    types.SymbolKind.Enum: CompletionItemKind.Enum,
+    types.SymbolKind.EnumMember: CompletionItemKind.EnumMember,
+    types.SymbolKind.Interface: CompletionItemKind.Interface,
+    types.SymbolKind.Event: CompletionItemKind.Event,
+}
+
+# Decorators making a function callable from outside the contract
+_EXTERNAL_DECORATORS = frozenset({"external", "public"})
+
 
 def _get_trigger_context(doc: TextDocument, position: types.Position) -> Optional[str]:
     """
@@ -54,30 +71,18 @@ def _symbol_kind_to_completion_kind(
     kind: types.SymbolKind,
 ) -> types.CompletionItemKind:
     """Convert LSP SymbolKind to CompletionItemKind."""
-    mapping = {
-        types.SymbolKind.Function: CompletionItemKind.Function,
-        types.SymbolKind.Method: CompletionItemKind.Method,
-        types.SymbolKind.Variable: CompletionItemKind.Variable,
-        types.SymbolKind.Constant: CompletionItemKind.Constant,
-        types.SymbolKind.Field: CompletionItemKind.Field,
-        types.SymbolKind.Struct: CompletionItemKind.Struct,
-        types.SymbolKind.Enum: CompletionItemKind.Enum,
-        types.SymbolKind.EnumMember: CompletionItemKind.EnumMember,
-        types.SymbolKind.Interface: CompletionItemKind.Interface,
-        types.SymbolKind.Event: CompletionItemKind.Event,
-    }
-    return mapping.get(kind, CompletionItemKind.Text)
+    return _COMPLETION_KINDS.get(kind, CompletionItemKind.Text)
 
 
 def _is_internal_function(func: nodes.FunctionDef) -> bool:
     """Check if a function is internal (not external/public)."""
     for decorator in func.decorator_list:
         if isinstance(decorator, nodes.Name):
-            if decorator.id in ("external", "public"):
+            if decorator.id in _EXTERNAL_DECORATORS:
                 return False
         elif isinstance(decorator, nodes.Call):
             if isinstance(decorator.func, nodes.Name):
-                if decorator.func.id in ("external", "public"):
+                if decorator.func.id in _EXTERNAL_DECORATORS:
                     return False
     return True
 
@@ -123,12 +128,18 @@ def get_self_completions(module: Module) -> List[types.CompletionItem]:
     """
     Get completions for `self.` - state variables and internal functions.
 
+    The items are computed once per parsed module.
+
     Args:
         module: The current module.
 
     Returns:
         List of CompletionItem objects.
     """
+    cached = module.completions.get("self")
+    if cached is not None:
+        return list(cached)
+
     completions: List[types.CompletionItem] = []
 
     # Add state variables (non-constant, non-immutable)
@@ -179,7 +190,8 @@ def get_self_completions(module: Module) -> List[types.CompletionItem]:
                 )
             )
 
-    return completions
+    module.completions["self"] = completions
+    return list(completions)
 
 
 def get_module_completions(
@@ -220,6 +232,11 @@ def get_module_completions(
     if resolved_module is None:
         return completions
 
+    # The items only depend on the imported module, compute them once per parse
+    cached = resolved_module.completions.get("external")
+    if cached is not None:
+        return list(cached)
+
     # Get the external namespace from the imported module
     external_ns = resolved_module.external_namespace()
 
@@ -290,7 +307,8 @@ def get_module_completions(
                 )
             )
 
-    return completions
+    resolved_module.completions["external"] = completions
+    return list(completions)
 
 
 def get_completions(
@@ -16,18 +16,27 @@ semantic analysis without generating bytecode (faster).
 For older versions, we run full compilation.
 """
 
-import json
+import hashlib
 import logging
+import os
 import re
-import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from textwrap import dedent
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
+import orjson
 from lsprotocol import types
 from packaging.version import Version
 
-from couleuvre.ast.environment import resolve_environment
+from couleuvre.ast.environment import (
+    SystemEnvironment,
+    VyperEnvironment,
+    resolve_environment,
+)
+from couleuvre.ast.parser import BUFFER_INPUT_BUNDLE_SCRIPT
 
 logger = logging.getLogger("couleuvre")
 
@@ -38,70 +47,117 @@ _ERROR_LOCATION_PATTERN = re.compile(r"line\s+(\d+):(\d+)")
 # Pattern to extract the error type (e.g., "TypeMismatch", "UndeclaredDefinition")
 _ERROR_TYPE_PATTERN = re.compile(r"vyper\.exceptions\.(\w+)")
 
-
-def _get_compile_script(
-    file_path: str,
-    vyper_version: str,
-    search_paths: list[str],
-    source: Optional[str] = None,
-) -> str:
+# Both patterns above, to scan a traceback once
+_TRACEBACK_PATTERN = re.compile(
+    r"line\s+(?P<line>\d+):(?P<col>\d+)|vyper\.exceptions\.(?P<type>\w+)"
+)
+
+# Severities of the Vyper error types that are not errors.
+# Could add warnings for deprecation notices, etc.
+_SEVERITIES: Dict[Optional[str], types.DiagnosticSeverity] = {
+    "DeprecationWarning": types.DiagnosticSeverity.Warning,
+    "SyntaxWarning": types.DiagnosticSeverity.Warning,
+}
+
+# Maximum number of files whose diagnostics are kept in memory
+DIAGNOSTICS_CACHE_SIZE = 64
+
+# Diagnostics by file path, each stored alongside the key they were computed
+# with. Only the latest compilation of a file is kept.
+_diagnostics_cache: "OrderedDict[str, Tuple[tuple, List[types.Diagnostic]]]" = (
+    OrderedDict()
+)
+_cache_lock = threading.Lock()
+
+# Serializes the compilations run in the server process
+_in_process_lock = threading.Lock()
+
+
+# Defines get_error_info, which describes the exception being handled as the
+# JSON output of the scripts below. Formatting a traceback is costly, so the
+# exceptions it was raised from are only summarized ("causes", oldest first,
+# in the format of traceback lines) unless COULEUVRE_DEBUG_TRACEBACK=1.
+_ERROR_INFO_SCRIPT = dedent(
     """
-    Generate a Python script that performs full Vyper compilation.
-
-    This runs the complete compilation pipeline, not just AST extraction.
+    import os
+    import traceback
+
+    def get_error_info(e):
+        error_info = {
+            "success": False,
+            "error_module": type(e).__module__,
+            "error_qualname": type(e).__qualname__,
+            "message": str(e),
+        }
+        causes = []
+        seen = {id(e)}
+        cause = e.__cause__ or e.__context__
+        while cause is not None and id(cause) not in seen:
+            seen.add(id(cause))
+            cause_type = type(cause)
+            causes.append(f"{cause_type.__module__}.{cause_type.__qualname__}: {cause}")
+            cause = cause.__cause__ or cause.__context__
+        if causes:
+            error_info["causes"] = causes[::-1]
+        if os.environ.get("COULEUVRE_DEBUG_TRACEBACK") == "1":
+            error_info["traceback"] = traceback.format_exc()
+        # Try to extract location from annotations (Vyper AST nodes)
+        if hasattr(e, 'annotations') and e.annotations:
+            node = e.annotations[0]
+            if hasattr(node, 'lineno'):
+                error_info["lineno"] = node.lineno
+                error_info["col_offset"] = getattr(node, 'col_offset', 0)
+                error_info["end_lineno"] = getattr(node, 'end_lineno', node.lineno)
+                error_info["end_col_offset"] = getattr(node, 'end_col_offset', error_info["col_offset"] + 1)
+        return error_info
     """
-    if Version(vyper_version) < Version("0.4.0"):
-        # For older versions, pass source directly
-        if source is None:
-            source = Path(file_path).read_text()
-        return dedent(
-            f"""
-            import json
-            import sys
-            import traceback
+)
 
-            try:
-                from vyper import compile_code
-                # Full compilation - will raise on any error
-                compile_code({json.dumps(source)})
-                print(json.dumps({{"success": True}}))
-            except Exception as e:
-                error_info = {{
-                    "success": False,
-                    "error_type": type(e).__name__,
-                    "message": str(e),
-                    "traceback": traceback.format_exc()
-                }}
-                # Try to extract location from annotations (Vyper AST nodes)
-                if hasattr(e, 'annotations') and e.annotations:
-                    node = e.annotations[0]
-                    if hasattr(node, 'lineno'):
-                        error_info["lineno"] = node.lineno
-                        error_info["col_offset"] = getattr(node, 'col_offset', 0)
-                        error_info["end_lineno"] = getattr(node, 'end_lineno', node.lineno)
-                        error_info["end_col_offset"] = getattr(node, 'end_col_offset', error_info["col_offset"] + 1)
-                print(json.dumps(error_info))
-            """
-        )
+# The compilation scripts are static, built once at import: their inputs are
+# passed as the `args` global of the worker request, so that each worker
+# compiles every script once.
+# For versions before 0.4.0, the source is passed directly to compile_code
+_LEGACY_COMPILE_SCRIPT = _ERROR_INFO_SCRIPT + dedent(
+    """
+    import json
+    import sys
+    from pathlib import Path
 
-    # For version >= 0.4.0, use FilesystemInputBundle and stop at annotated AST
-    # This runs semantic analysis (type checking) without full bytecode generation
-    return dedent(
-        f"""
+    try:
+        from vyper import compile_code
+        source = args["source"]
+        if source is None:
+            source = Path(args["file_path"]).read_text()
+        # Full compilation - will raise on any error
+        compile_code(source)
+        print(json.dumps({"success": True}))
+    except Exception as e:
+        print(json.dumps(get_error_info(e)))
+    """
+)
+
+# For version >= 0.4.0, use FilesystemInputBundle and stop at annotated AST
+# This runs semantic analysis (type checking) without full bytecode generation.
+# An unsaved buffer is served from memory in place of the file on disk.
+_COMPILE_SCRIPT = (
+    _ERROR_INFO_SCRIPT
+    + BUFFER_INPUT_BUNDLE_SCRIPT
+    + dedent(
+        """
         import json
         import sys
-        import traceback
         from pathlib import Path
 
         try:
             from vyper.compiler import CompilerData
-            from vyper.compiler.input_bundle import FilesystemInputBundle
 
-            search_paths = [Path(p) for p in {json.dumps(search_paths)}]
-            input_bundle = FilesystemInputBundle(search_paths)
+            search_paths = [Path(p) for p in args["search_paths"]]
+            input_bundle = BufferInputBundle(
+                search_paths, {args["file_path"]: args["source"]}
+            )
 
             # Load file through input bundle
-            file = input_bundle.load_file({json.dumps(file_path)})
+            file = input_bundle.load_file(args["file_path"])
 
             # Create CompilerData and run semantic analysis up to annotated AST
             # This catches type errors without generating bytecode
@@ -111,25 +167,169 @@ def _get_compile_script(
             # This is faster than full compilation but still catches type errors
             _ = compiler_data.annotated_vyper_module
 
-            print(json.dumps({{"success": True}}))
+            print(json.dumps({"success": True}))
+        except Exception as e:
+            print(json.dumps(get_error_info(e)))
+        """
+    )
+)
+
+# Batch variants, compiling the files of args["files"] (pairs of path and
+# unsaved source) one after the other: output {path: output of the single
+# file scripts}
+_LEGACY_BATCH_COMPILE_SCRIPT = _ERROR_INFO_SCRIPT + dedent(
+    """
+    import json
+    from pathlib import Path
+    from vyper import compile_code
+
+    output = {}
+    for path, source in args["files"]:
+        try:
+            if source is None:
+                source = Path(path).read_text()
+            compile_code(source)
+            output[path] = {"success": True}
         except Exception as e:
-            error_info = {{
-                "success": False,
-                "error_type": type(e).__name__,
-                "message": str(e),
-                "traceback": traceback.format_exc()
-            }}
-            # Try to extract location from annotations (Vyper AST nodes)
-            if hasattr(e, 'annotations') and e.annotations:
-                node = e.annotations[0]
-                if hasattr(node, 'lineno'):
-                    error_info["lineno"] = node.lineno
-                    error_info["col_offset"] = getattr(node, 'col_offset', 0)
-                    error_info["end_lineno"] = getattr(node, 'end_lineno', node.lineno)
-                    error_info["end_col_offset"] = getattr(node, 'end_col_offset', error_info["col_offset"] + 1)
-            print(json.dumps(error_info))
+            output[path] = get_error_info(e)
+    print(json.dumps(output))
+    """
+)
+
+# Each file gets an input bundle holding only its own unsaved buffer, as in
+# _COMPILE_SCRIPT: its diagnostics must not depend on the other files of the
+# batch, which the cache key of a file does not cover
+_BATCH_COMPILE_SCRIPT = (
+    _ERROR_INFO_SCRIPT
+    + BUFFER_INPUT_BUNDLE_SCRIPT
+    + dedent(
+        """
+        import json
+        from pathlib import Path
+        from vyper.compiler import CompilerData
+
+        search_paths = [Path(p) for p in args["search_paths"]]
+        output = {}
+        for path, source in args["files"]:
+            try:
+                input_bundle = BufferInputBundle(search_paths, {path: source})
+                file = input_bundle.load_file(path)
+                _ = CompilerData(file, input_bundle).annotated_vyper_module
+                output[path] = {"success": True}
+            except Exception as e:
+                output[path] = get_error_info(e)
+        print(json.dumps(output))
         """
     )
+)
+
+
+@lru_cache(maxsize=None)
+def _uses_input_bundle(vyper_version: str) -> bool:
+    """Whether a Vyper version compiles files through FilesystemInputBundle."""
+    return Version(vyper_version) >= Version("0.4.0")
+
+
+def _get_compile_script(
+    file_path: str,
+    vyper_version: str,
+    search_paths: list[str],
+    source: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the Python script that performs full Vyper compilation, along with
+    its arguments.
+
+    This runs the complete compilation pipeline, not just AST extraction.
+    """
+    if _uses_input_bundle(vyper_version):
+        script = _COMPILE_SCRIPT
+    else:
+        script = _LEGACY_COMPILE_SCRIPT
+    args = {"file_path": file_path, "search_paths": search_paths, "source": source}
+    return script, args
+
+
+def _get_batch_compile_script(
+    files: List[Tuple[str, Optional[str]]],
+    vyper_version: str,
+    search_paths: list[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get the Python script compiling several files in one run, along with
+    its arguments.
+    """
+    if _uses_input_bundle(vyper_version):
+        script = _BATCH_COMPILE_SCRIPT
+    else:
+        script = _LEGACY_BATCH_COMPILE_SCRIPT
+    return script, {"files": files, "search_paths": search_paths}
+
+
+def _resolve_search_paths(
+    search_paths: list[str], workspace_path: Optional[str]
+) -> list[str]:
+    """
+    Make search paths absolute, relative to the directory the compile script
+    would run in.
+    """
+    base = workspace_path or os.getcwd()
+    return [os.path.join(base, p) for p in search_paths]
+
+
+@lru_cache(maxsize=None)
+def _buffer_input_bundle_class() -> type:
+    """Define BufferInputBundle with the Vyper installed alongside the server."""
+    namespace: Dict[str, Any] = {}
+    exec(BUFFER_INPUT_BUNDLE_SCRIPT, namespace)
+    return namespace["BufferInputBundle"]
+
+
+@lru_cache(maxsize=None)
+def _error_info_function() -> Callable[[Exception], Dict[str, Any]]:
+    """Define get_error_info in the server process."""
+    namespace: Dict[str, Any] = {}
+    exec(_ERROR_INFO_SCRIPT, namespace)
+    return namespace["get_error_info"]
+
+
+def _compile_in_process(
+    files: List[Tuple[str, Optional[str]]],
+    vyper_version: str,
+    search_paths: list[str],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compile files, given as pairs of path and unsaved source, with the Vyper
+    installed alongside the server.
+
+    Mirrors the batch compilation scripts and returns the same output.
+    Vyper's semantic analysis keeps global state, so compilations are
+    serialized.
+    """
+    outputs: Dict[str, Dict[str, Any]] = {}
+    with _in_process_lock:
+        legacy = not _uses_input_bundle(vyper_version)
+        paths = [Path(p) for p in search_paths]
+        for file_path, source in files:
+            try:
+                if legacy:
+                    from vyper import compile_code
+
+                    if source is None:
+                        source = Path(file_path).read_text()
+                    compile_code(source)
+                else:
+                    from vyper.compiler import CompilerData
+
+                    input_bundle = _buffer_input_bundle_class()(
+                        paths, {file_path: source}
+                    )
+                    file = input_bundle.load_file(file_path)
+                    _ = CompilerData(file, input_bundle).annotated_vyper_module
+                outputs[file_path] = {"success": True}
+            except Exception as e:
+                outputs[file_path] = _error_info_function()(e)
+    return outputs
 
 
 def parse_error_location(message: str) -> Tuple[int, int]:
@@ -157,14 +357,30 @@ def _parse_error_type(traceback_str: str) -> Optional[str]:
     return None
 
 
+def _scan_traceback(traceback_str: str) -> Tuple[Optional[str], Tuple[int, int]]:
+    """
+    Extract both the Vyper exception type and the error location from a
+    traceback, in a single pass.
+
+    Returns the results of _parse_error_type and parse_error_location.
+    """
+    error_type: Optional[str] = None
+    location: Optional[Tuple[int, int]] = None
+    for match in _TRACEBACK_PATTERN.finditer(traceback_str):
+        if match.group("type") is not None:
+            error_type = error_type or match.group("type")
+        elif location is None:
+            line = int(match.group("line")) - 1
+            location = max(0, line), max(0, int(match.group("col")))
+        if error_type is not None and location is not None:
+            break
+    return error_type, location or (0, 0)
+
+
 def _get_severity(error_type: Optional[str]) -> types.DiagnosticSeverity:
     """Map Vyper error types to LSP diagnostic severities."""
     # Most Vyper errors are actual errors
-    # Could add warnings for deprecation notices, etc.
-    warning_types = {"DeprecationWarning", "SyntaxWarning"}
-    if error_type in warning_types:
-        return types.DiagnosticSeverity.Warning
-    return types.DiagnosticSeverity.Error
+    return _SEVERITIES.get(error_type, types.DiagnosticSeverity.Error)
 
 
 def create_diagnostic(
@@ -207,20 +423,69 @@ def create_diagnostic(
     )
 
 
+def _file_state(path: str) -> Optional[Tuple[int, int]]:
+    """Return the (mtime_ns, size) of a file, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _diagnostics_cache_key(
+    path: str,
+    vyper_version: str,
+    search_paths: list[str],
+    workspace_path: Optional[str],
+    source: Optional[str],
+    dependencies: Sequence[str],
+) -> tuple:
+    """Build the key under which the diagnostics of a file are cached."""
+    digest = hashlib.sha1(source.encode()).hexdigest() if source is not None else None
+    return (
+        _file_state(path),
+        digest,
+        vyper_version,
+        tuple(search_paths),
+        workspace_path,
+        tuple((dependency, _file_state(dependency)) for dependency in dependencies),
+    )
+
+
+def clear_diagnostics_cache() -> None:
+    """Drop all cached diagnostics."""
+    with _cache_lock:
+        _diagnostics_cache.clear()
+
+
+def get_diagnostics_result_id(diagnostics: List[types.Diagnostic]) -> str:
+    """
+    Identify a diagnostics report by its content, so that a client pulling
+    unchanged diagnostics can be told so instead of receiving them again.
+    """
+    return hashlib.sha1(repr(diagnostics).encode()).hexdigest()
+
+
 def compile_and_get_diagnostics(
     path: str,
     vyper_version: str,
     workspace_path: Optional[str] = None,
     source: Optional[str] = None,
+    dependencies: Sequence[str] = (),
 ) -> List[types.Diagnostic]:
     """
     Run full Vyper compilation and extract diagnostics.
 
+    The diagnostics of the latest compilation of each file are cached, and
+    reused as long as the file, its source and its dependencies are unchanged.
+
     Args:
         path: Path to the Vyper source file.
         vyper_version: The Vyper version to use.
         workspace_path: Root path for resolving relative imports.
         source: Optional source content (for unsaved buffers).
+        dependencies: Paths of the modules imported by the file, directly or
+            not, whose changes on disk invalidate the cached diagnostics.
 
     Returns:
         List of LSP Diagnostic objects.
@@ -228,66 +493,161 @@ def compile_and_get_diagnostics(
     env = resolve_environment(vyper_version)
     search_paths = env.get_search_paths(include_sys_path=True)
 
-    # For Vyper >= 0.4.0 with unsaved buffer, write to a temp file
-    temp_file = None
-    effective_path = path
-    if source is not None and Version(vyper_version) >= Version("0.4.0"):
-        suffix = Path(path).suffix or ".vy"
-        temp_file = tempfile.NamedTemporaryFile(
-            mode="w", suffix=suffix, delete=False, dir=Path(path).parent
-        )
-        temp_file.write(source)
-        temp_file.close()
-        effective_path = temp_file.name
+    cache_key = _diagnostics_cache_key(
+        path, vyper_version, search_paths, workspace_path, source, dependencies
+    )
+    with _cache_lock:
+        entry = _diagnostics_cache.get(path)
+        if entry is not None and entry[0] == cache_key:
+            _diagnostics_cache.move_to_end(path)
+            logger.debug("Using cached diagnostics for %s", path)
+            return list(entry[1])
+
+    diagnostics = _compile_diagnostics(
+        env, path, vyper_version, search_paths, workspace_path, source
+    )
+    _store_cached_diagnostics(path, cache_key, diagnostics)
+    return list(diagnostics)
 
-    try:
-        script = _get_compile_script(
-            effective_path, vyper_version, search_paths, source
-        )
-        result = env.run_script(script, cwd=workspace_path)
-    finally:
-        # Clean up temp file
-        if temp_file is not None:
-            try:
-                Path(temp_file.name).unlink()
-            except OSError:
-                pass
 
-    # Parse the JSON result
-    diagnostics: List[types.Diagnostic] = []
-    temp_name = Path(temp_file.name).name if temp_file else None
-    original_name = Path(path).name
+def compile_and_get_diagnostics_batch(
+    files: Sequence[Tuple[str, Optional[str]]],
+    vyper_version: str,
+    workspace_path: Optional[str] = None,
+    dependencies: Optional[Mapping[str, Sequence[str]]] = None,
+) -> Dict[str, List[types.Diagnostic]]:
+    """
+    Run full Vyper compilation of several files and extract their
+    diagnostics, with a single worker round-trip.
 
-    def sanitize_message(msg: str) -> str:
-        """Replace temp file name with original file name in messages."""
-        if temp_name:
-            return msg.replace(temp_name, original_name)
-        return msg
+    Cached diagnostics are reused as in compile_and_get_diagnostics.
 
-    try:
-        output = json.loads(result.stdout)
-    except json.JSONDecodeError:
+    Args:
+        files: Pairs of path to a Vyper source file and its optional source
+            content (for unsaved buffers).
+        vyper_version: The Vyper version to use.
+        workspace_path: Root path for resolving relative imports.
+        dependencies: Paths of the modules imported by each file, directly
+            or not.
+
+    Returns:
+        Mapping of path to its list of LSP Diagnostic objects.
+
+    Raises:
+        RuntimeError: If the Vyper subprocess itself failed.
+    """
+    env = resolve_environment(vyper_version)
+    search_paths = env.get_search_paths(include_sys_path=True)
+    dependencies = dependencies or {}
+
+    results: Dict[str, List[types.Diagnostic]] = {}
+    misses: List[Tuple[str, Optional[str]]] = []
+    cache_keys: Dict[str, tuple] = {}
+    with _cache_lock:
+        for path, source in files:
+            cache_key = _diagnostics_cache_key(
+                path,
+                vyper_version,
+                search_paths,
+                workspace_path,
+                source,
+                dependencies.get(path, ()),
+            )
+            entry = _diagnostics_cache.get(path)
+            if entry is not None and entry[0] == cache_key:
+                _diagnostics_cache.move_to_end(path)
+                results[path] = list(entry[1])
+            elif path not in cache_keys:
+                misses.append((path, source))
+                cache_keys[path] = cache_key
+
+    if not misses:
+        return results
+
+    if isinstance(env, SystemEnvironment):
+        outputs = _compile_in_process(
+            misses,
+            vyper_version,
+            _resolve_search_paths(search_paths, workspace_path),
+        )
+    else:
+        script, args = _get_batch_compile_script(misses, vyper_version, search_paths)
+        result = env.run_worker_script(script, cwd=workspace_path, args=args)
+        try:
+            outputs = orjson.loads(result.stdout)
+        except orjson.JSONDecodeError:
+            error_message = (
+                result.stderr.decode(errors="replace").strip() or "Unknown error"
+            )
+            raise RuntimeError(error_message) from None
+
+    for path, output in outputs.items():
+        diagnostics = _diagnostics_from_output(output)
+        _store_cached_diagnostics(path, cache_keys[path], diagnostics)
+        results[path] = list(diagnostics)
+    return results
+
+
+def _store_cached_diagnostics(
+    path: str, key: tuple, diagnostics: List[types.Diagnostic]
+) -> None:
+    """Cache the diagnostics of a file, evicting the least recently used."""
+    with _cache_lock:
+        _diagnostics_cache[path] = (key, diagnostics)
+        _diagnostics_cache.move_to_end(path)
+        while len(_diagnostics_cache) > DIAGNOSTICS_CACHE_SIZE:
+            _diagnostics_cache.popitem(last=False)
+
+
+def _compile_diagnostics(
+    env: VyperEnvironment,
+    path: str,
+    vyper_version: str,
+    search_paths: list[str],
+    workspace_path: Optional[str],
+    source: Optional[str],
+) -> List[types.Diagnostic]:
+    """Compile a file and extract its diagnostics."""
+    if isinstance(env, SystemEnvironment):
+        # The server's own Vyper is the requested one: no need for a
+        # round-trip to another interpreter
+        output = _compile_in_process(
+            [(path, source)],
+            vyper_version,
+            _resolve_search_paths(search_paths, workspace_path),
+        )[path]
+        stderr = b""
+    else:
+        script, args = _get_compile_script(path, vyper_version, search_paths, source)
+        # Vyper stays imported in the worker between diagnostics runs
+        result = env.run_worker_script(script, cwd=workspace_path, args=args)
+        stderr = result.stderr
+        try:
+            output = orjson.loads(result.stdout)
+        except orjson.JSONDecodeError:
+            output = None
+
+    if output is None:
         # If we can't parse JSON, check stderr for errors
-        if result.stderr:
-            error_message = sanitize_message(result.stderr.strip())
+        diagnostics: List[types.Diagnostic] = []
+        if stderr:
+            error_message = stderr.decode(errors="replace").strip()
             line, col = parse_error_location(error_message)
             diagnostics.append(create_diagnostic(error_message, line, col))
         return diagnostics
 
+    return _diagnostics_from_output(output)
+
+
+def _diagnostics_from_output(output: Dict[str, Any]) -> List[types.Diagnostic]:
+    """Build the diagnostics of a compilation from its script output."""
     if output.get("success"):
         # No errors - return empty diagnostics
         return []
 
     # Extract error information
-    error_type = output.get("error_type")
-    message = sanitize_message(output.get("message", "Unknown compilation error"))
-    traceback_str = sanitize_message(output.get("traceback", ""))
-
-    # Try to get more specific error type from traceback
-    if not error_type or error_type == "Exception":
-        parsed_type = _parse_error_type(traceback_str)
-        if parsed_type:
-            error_type = parsed_type
+    error_type = output.get("error_qualname")
+    message = output.get("message", "Unknown compilation error")
 
     # Extract location - prefer structured data from Vyper AST nodes
     if "lineno" in output:
@@ -299,17 +659,29 @@ def compile_and_get_diagnostics(
     else:
         # Fallback to parsing error message
         start_line, start_col = parse_error_location(message)
-        if start_line == 0 and start_col == 0:
-            start_line, start_col = parse_error_location(traceback_str)
         end_line = start_line
         end_col = start_col + 1
 
+    # Fallback to the traceback, or the summary of the exceptions the error
+    # was raised from, for a more specific error type or a missing location.
+    # It is scanned at most once, for both.
+    generic_type = not error_type or error_type == "Exception"
+    missing_location = "lineno" not in output and (start_line, start_col) == (0, 0)
+    if generic_type or missing_location:
+        traceback_str = output.get("traceback") or "\n".join(output.get("causes", ()))
+        traceback_type, traceback_location = _scan_traceback(traceback_str)
+        if generic_type and traceback_type:
+            error_type = traceback_type
+        if missing_location:
+            start_line, start_col = traceback_location
+            end_line, end_col = start_line, start_col + 1
+
     severity = _get_severity(error_type)
 
     # Format the message nicely
     formatted_message = f"[{error_type}] {message}" if error_type else message
 
-    diagnostics.append(
+    return [
         create_diagnostic(
             message=formatted_message,
             start_line=start_line,
@@ -318,6 +690,4 @@ def compile_and_get_diagnostics(
             end_col=end_col,
             severity=severity,
         )
-    )
-
-    return diagnostics
+    ]
@@ -7,16 +7,38 @@ references (via imports).
 """
 
 import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Optional, Sequence, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+)
 
 from lsprotocol import types
 
 from couleuvre.ast import nodes
 from couleuvre.ast.nodes import BaseNode
+from couleuvre.ast.worker import MAX_WORKERS
 from couleuvre.features.symbol_table import ReferencePattern
 from couleuvre.parser import Module
-from couleuvre.utils import range_from_node
+from couleuvre.utils import find_vyper_files, range_from_node
 
 logger = logging.getLogger("couleuvre")
 
@@ -123,12 +145,12 @@ def prefix_patterns(
 # -----------------------------------------------------------------------------
 
 
-def _extract_chain(node: BaseNode) -> Optional[List[str]]:
+def _extract_chain(node: BaseNode) -> Optional[Tuple[str, ...]]:
     """
     Extract the identifier chain from an AST node.
 
-    For attribute access like 'self.foo.bar', returns ['self', 'foo', 'bar'].
-    For simple names like 'MAX', returns ['MAX'].
+    For attribute access like 'self.foo.bar', returns ('self', 'foo', 'bar').
+    For simple names like 'MAX', returns ('MAX',).
 
     Returns None if the node doesn't represent an identifier chain.
     """
@@ -141,12 +163,11 @@ def _extract_chain(node: BaseNode) -> Optional[List[str]]:
             value = value.value
         if isinstance(value, nodes.Name):
             chain.append(value.id)
-            chain.reverse()
-            return chain
+            return tuple(reversed(chain))
         return None
 
     if isinstance(node, nodes.Name):
-        return [node.id]
+        return (node.id,)
 
     return None
 
@@ -161,29 +182,35 @@ def _is_declaration_node(candidate: BaseNode, definition: BaseNode) -> bool:
     return False
 
 
-def _is_inside_declaration_context(node: BaseNode) -> bool:
-    """
-    Check if the node is inside a declaration context where names are definitions,
-    not references (e.g., flag members, event fields, struct fields).
-    """
-    parent = node.parent
-    while parent is not None:
-        if isinstance(parent, (nodes.FlagDef, nodes.EventDef, nodes.StructDef)):
-            return True
-        parent = getattr(parent, "parent", None)
-    return False
+# Declaration contexts, where names are definitions, not references
+# (e.g., flag members, event fields, struct fields)
+_DECLARATION_CONTEXTS = (nodes.FlagDef, nodes.EventDef, nodes.StructDef)
+
+
+# Reference patterns prepared for matching: the set of chains matching
+# exactly, and the chains whose extensions match as well
+_CompiledPatterns = Tuple[FrozenSet[Tuple[str, ...]], Tuple[Tuple[str, ...], ...]]
+
+
+def _compile_patterns(patterns: List[ReferencePattern]) -> _CompiledPatterns:
+    """Prepare reference patterns for matching many chains against them."""
+    exact = frozenset(tuple(expected) for expected, _ in patterns)
+    prefixes = tuple(
+        tuple(expected) for expected, allow_prefix in patterns if allow_prefix
+    )
+    return exact, prefixes
 
 
-def _matches_pattern(chain: Sequence[str], patterns: List[ReferencePattern]) -> bool:
+def _matches_pattern(chain: Tuple[str, ...], patterns: _CompiledPatterns) -> bool:
     """Check if an identifier chain matches any of the reference patterns."""
-    for expected, allow_prefix in patterns:
-        # Exact match
-        if list(chain) == expected:
+    exact, prefixes = patterns
+    # Exact match
+    if chain in exact:
+        return True
+    # Prefix match (for flags: Status matches Status.ACTIVE)
+    for prefix in prefixes:
+        if chain[: len(prefix)] == prefix:
             return True
-        # Prefix match (for flags: Status matches Status.ACTIVE)
-        if allow_prefix and len(chain) >= len(expected):
-            if list(chain[: len(expected)]) == expected:
-                return True
     return False
 
 
@@ -192,28 +219,75 @@ def _matches_pattern(chain: Sequence[str], patterns: List[ReferencePattern]) ->
 # -----------------------------------------------------------------------------
 
 
-def _walk_ast(node: BaseNode):
+# Fields every node has, none of which holds child nodes
+_NODE_ATTRIBUTE_FIELDS = frozenset(f.name for f in fields(BaseNode))
+
+# Field types that never hold child nodes
+_SCALAR_TYPES = frozenset({str, int, bool, bytes, type(None)})
+
+
+def _may_hold_nodes(field_type: Any) -> bool:
+    """Check if a field annotated with the given type may hold child nodes."""
+    if get_origin(field_type) is Union:
+        return not all(arg in _SCALAR_TYPES for arg in get_args(field_type))
+    return field_type not in _SCALAR_TYPES
+
+
+# Code pushing the child nodes held by one field, reversing lists to
+# maintain order when popping from the stack
+_PUSH_FIELD_TEMPLATE = """
+    value = node.{name}
+    if isinstance(value, BaseNode):
+        push(value)
+    elif isinstance(value, list):
+        for item in reversed(value):
+            if isinstance(item, BaseNode):
+                push(item)"""
+
+# Functions pushing the child nodes of a node on a stack, by node class
+_child_pushers: Dict[
+    Type[BaseNode], Callable[[BaseNode, Callable[[BaseNode], None]], None]
+] = {}
+
+
+def _get_child_pusher(
+    node_class: Type[BaseNode],
+) -> Callable[[BaseNode, Callable[[BaseNode], None]], None]:
+    """
+    Get a function pushing the child nodes of an instance of a node class,
+    generated to read exactly the fields of that class that may hold them:
+    fields annotated with scalar types are never read.
+    """
+    pusher = _child_pushers.get(node_class)
+    if pusher is None:
+        body = "".join(
+            _PUSH_FIELD_TEMPLATE.format(name=node_field.name)
+            for node_field in fields(node_class)
+            if node_field.name not in _NODE_ATTRIBUTE_FIELDS
+            and _may_hold_nodes(node_field.type)
+        )
+        namespace: Dict[str, Any] = {"BaseNode": BaseNode}
+        exec(f"def push_children(node, push):{body or ' pass'}", namespace)
+        pusher = _child_pushers[node_class] = namespace["push_children"]
+    return pusher
+
+
+def _walk_ast(node: BaseNode, prune: Tuple[type, ...] = ()):
     """
     Iterate over all nodes in an AST tree (depth-first).
 
-    Skips 'parent' fields to avoid infinite loops.
+    Skips 'parent' fields to avoid infinite loops. The children of nodes of
+    a type in `prune` are not visited.
     """
     stack = [node]
+    pop = stack.pop
+    push = stack.append
     while stack:
-        current = stack.pop()
+        current = pop()
         yield current
-        # Iterate over dataclass fields
-        for field_name in current.__dataclass_fields__:
-            if field_name == "parent":
-                continue
-            value = getattr(current, field_name, None)
-            if isinstance(value, BaseNode):
-                stack.append(value)
-            elif isinstance(value, list):
-                # Reverse to maintain order when popping from stack
-                for item in reversed(value):
-                    if isinstance(item, BaseNode):
-                        stack.append(item)
+        if prune and isinstance(current, prune):
+            continue
+        _get_child_pusher(type(current))(current, push)
 
 
 # -----------------------------------------------------------------------------
@@ -221,6 +295,44 @@ def _walk_ast(node: BaseNode):
 # -----------------------------------------------------------------------------
 
 
+# Nodes found at a walk position, the order references are reported in
+_IndexedNodes = List[Tuple[int, BaseNode]]
+
+
+@dataclass
+class _ReferenceIndex:
+    """
+    Nodes of a module that may be references, by identifier chain.
+
+    Names inside declaration contexts (flag members, event fields, etc.) are
+    left out, as they are definitions rather than references.
+    """
+
+    # Nodes by their chain
+    chains: Dict[Tuple[str, ...], _IndexedNodes] = field(default_factory=dict)
+    # Nodes by each proper prefix of their chain, for prefix patterns
+    prefixes: Dict[Tuple[str, ...], _IndexedNodes] = field(default_factory=dict)
+
+
+def _get_reference_index(module: Module) -> _ReferenceIndex:
+    """Get the reference index of a module, building it on the first call."""
+    index = module.reference_index
+    if index is None:
+        index = _ReferenceIndex()
+        for position, node in enumerate(
+            _walk_ast(module.ast, prune=_DECLARATION_CONTEXTS)
+        ):
+            chain = _extract_chain(node)
+            if chain is None:
+                continue
+            entry = (position, node)
+            index.chains.setdefault(chain, []).append(entry)
+            for length in range(1, len(chain)):
+                index.prefixes.setdefault(chain[:length], []).append(entry)
+        module.reference_index = index
+    return index
+
+
 def find_references(
     module: Module,
     uri: str,
@@ -250,34 +362,40 @@ def find_references(
 
     def _add_location(node: BaseNode) -> None:
         """Add a location if not already seen."""
-        loc = types.Location(uri=uri, range=range_from_node(node))
-        key = (
-            loc.range.start.line,
-            loc.range.start.character,
-            loc.range.end.line,
-            loc.range.end.character,
-        )
+        key = (node.lineno, node.col_offset, node.end_lineno, node.end_col_offset)
         if key not in seen:
             seen.add(key)
-            locations.append(loc)
+            locations.append(types.Location(uri=uri, range=range_from_node(node)))
 
     # Optionally include the declaration itself
     if include_declaration and definition_node is not None:
         _add_location(definition_node)
 
-    # Walk the AST and find matching references
-    for node in _walk_ast(module.ast):
-        chain = _extract_chain(node)
-        if chain is None:
-            continue
+    # Until its index is built, a module whose source does not even contain
+    # the referenced name is not walked
+    if module.reference_index is None and module.source is not None:
+        if not any(
+            expected and expected[-1] in module.source for expected, _ in patterns
+        ):
+            return locations
+
+    # Look the patterns up in the module's index
+    index = _get_reference_index(module)
+    matches: _IndexedNodes = []
+    for expected, allow_prefix in patterns:
+        key = tuple(expected)
+        matches.extend(index.chains.get(key, ()))
+        if allow_prefix:
+            matches.extend(index.prefixes.get(key, ()))
+    if len(patterns) > 1 or patterns[0][1]:
+        # Report references in walk order
+        matches.sort(key=itemgetter(0))
+
+    for _, node in matches:
         # Skip the declaration node itself (we handled it above if needed)
         if definition_node and _is_declaration_node(node, definition_node):
             continue
-        # Skip names inside declaration contexts (flag members, event fields, etc.)
-        if _is_inside_declaration_context(node):
-            continue
-        if _matches_pattern(chain, patterns):
-            _add_location(node)
+        _add_location(node)
 
     return locations
 
@@ -291,6 +409,15 @@ def normalize_path(path: Optional[str]) -> Optional[str]:
     """Normalize a file path to an absolute, resolved path for comparison."""
     if path is None:
         return None
+    return _resolve_path(path)
+
+
+@lru_cache(maxsize=4096)
+def _resolve_path(path: str) -> str:
+    """
+    Resolve a path, remembering the result: paths are resolved over and over
+    by reference searches, and rarely change what they point to.
+    """
     try:
         return str(Path(path).resolve())
     except Exception:
@@ -298,6 +425,22 @@ def normalize_path(path: Optional[str]) -> Optional[str]:
         return path
 
 
+def _get_import_aliases(module: Module) -> Dict[str, List[str]]:
+    """
+    Get the import aliases of a module by normalized imported path, building
+    them on the first call.
+    """
+    aliases = module.import_aliases
+    if aliases is None:
+        aliases = {}
+        for alias, path in module.imports.items():
+            normalized = normalize_path(path)
+            if normalized is not None:
+                aliases.setdefault(normalized, []).append(alias)
+        module.import_aliases = aliases
+    return aliases
+
+
 def _module_path(module: Module, uri: str) -> Optional[str]:
     """
     Get the resolved file path for a module.
@@ -311,12 +454,7 @@ def _module_path(module: Module, uri: str) -> Optional[str]:
     path = pygls_uris.to_fs_path(uri)
     if path is None:
         path = module.ast.resolved_path
-    if path is None:
-        return None
-    try:
-        return str(Path(path).resolve())
-    except Exception:
-        return path
+    return normalize_path(path)
 
 
 def _get_search_terms(patterns: List[ReferencePattern]) -> List[str]:
@@ -333,13 +471,70 @@ def _get_search_terms(patterns: List[ReferencePattern]) -> List[str]:
     return list(set(terms))  # deduplicate
 
 
+# Identifiers appearing in workspace files, by path, each stored alongside
+# the (mtime_ns, size) of the file they were read from
+_identifier_cache: Dict[str, Tuple[Tuple[int, int], FrozenSet[bytes]]] = {}
+_identifier_cache_lock = threading.Lock()
+
+# Identifiers, captured, and the comments and string literals to skip over
+_IDENTIFIER_PATTERN = re.compile(
+    rb"#[^\n]*"
+    rb'|"""[\s\S]*?"""'
+    rb"|'''[\s\S]*?'''"
+    rb'|"(?:\\.|[^"\\\n])*"'
+    rb"|'(?:\\.|[^'\\\n])*'"
+    rb"|([A-Za-z_][A-Za-z0-9_]*)"
+)
+
+
+def _file_identifiers(file_path: str) -> Optional[FrozenSet[bytes]]:
+    """
+    Get the identifiers appearing in a file outside of comments and string
+    literals, reading it only if it changed since the last call. Returns None
+    if the file cannot be read.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    file_state = (stat.st_mtime_ns, stat.st_size)
+    with _identifier_cache_lock:
+        cached = _identifier_cache.get(file_path)
+    if cached is not None and cached[0] == file_state:
+        return cached[1]
+
+    try:
+        with open(file_path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    identifiers = frozenset(_IDENTIFIER_PATTERN.findall(content)) - {b""}
+    with _identifier_cache_lock:
+        _identifier_cache[file_path] = (file_state, identifiers)
+    return identifiers
+
+
+def forget_file(path: str) -> None:
+    """
+    Forget what was remembered about a file that changed on disk: the paths
+    resolved, which may now point elsewhere, and the identifiers it contains.
+    """
+    _resolve_path.cache_clear()
+    with _identifier_cache_lock:
+        _identifier_cache.pop(path, None)
+        _identifier_cache.pop(_resolve_path(path), None)
+
+
 def _find_files_with_pattern(
     workspace_root: str, search_terms: List[str], exclude_paths: Set[str]
 ) -> List[Path]:
     """
     Find Vyper files in workspace that contain any of the search terms.
 
-    Uses fast text search to pre-filter files before expensive AST parsing.
+    Uses fast text search to pre-filter files before expensive AST parsing:
+    the identifiers of each file are extracted from its raw bytes and kept
+    until the file changes on disk, so that successive searches only stat
+    unchanged files.
 
     Args:
         workspace_root: Root path of the workspace.
@@ -352,32 +547,98 @@ def _find_files_with_pattern(
     if not workspace_root or not isinstance(workspace_root, str):
         return []
 
-    root = Path(workspace_root)
-    if not root.exists():
+    if not os.path.isdir(workspace_root):
         return []
 
+    # Symlinked directories are not walked into, so only the root and
+    # symlinked files need resolving
+    resolved_root = normalize_path(workspace_root)
+    if resolved_root is None:
+        return []
+    encoded_terms = [term.encode() for term in search_terms]
     matching_files: List[Path] = []
-    try:
-        for pattern in ("**/*.vy", "**/*.vyi"):
-            for file_path in root.glob(pattern):
-                # Skip files we've already searched
-                normalized = normalize_path(str(file_path))
-                if normalized in exclude_paths:
-                    continue
-
-                # Quick text search - read file and check for terms
-                try:
-                    content = file_path.read_text()
-                    if any(term in content for term in search_terms):
-                        matching_files.append(file_path)
-                except Exception:
-                    continue
-    except Exception as e:
-        logger.debug("Error scanning workspace for Vyper files: %s", e)
+    for file_path in find_vyper_files(workspace_root):
+        # Skip files we've already searched
+        if os.path.islink(file_path):
+            normalized = normalize_path(file_path)
+        else:
+            normalized = os.path.join(
+                resolved_root, os.path.relpath(file_path, workspace_root)
+            )
+        if normalized in exclude_paths:
+            continue
+
+        identifiers = _file_identifiers(file_path)
+        if identifiers is not None and any(
+            term in identifiers for term in encoded_terms
+        ):
+            matching_files.append(Path(file_path))
 
     return matching_files
 
 
+_scan_executor: Optional[ThreadPoolExecutor] = None
+_scan_executor_lock = threading.Lock()
+
+
+def _get_scan_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool searching workspace files, creating it if needed.
+
+    Threads only wait on Vyper workers, so one per worker is enough.
+    """
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is None:
+            _scan_executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="couleuvre-references"
+            )
+        return _scan_executor
+
+
+def _search_candidate_file(
+    get_module_func,
+    workspace,
+    file_path: Path,
+    patterns: List[ReferencePattern],
+    target_path: str,
+) -> List[types.Location]:
+    """
+    Find references to the target module's symbol in a workspace file that
+    was not loaded yet, through the aliases it imports the target under.
+    """
+    from pygls import uris as pygls_uris
+
+    try:
+        file_uri = pygls_uris.from_fs_path(str(file_path))
+        if file_uri is None:
+            return []
+
+        # Parse the file
+        file_doc = workspace.get_text_document(file_uri)
+        file_module = get_module_func(file_doc)
+        if file_module is None:
+            return []
+
+        # Build prefixed patterns for the aliases of the target module and search
+        search_patterns: List[ReferencePattern] = []
+        for alias in _get_import_aliases(file_module).get(target_path, ()):
+            search_patterns.extend(prefix_patterns(patterns, alias))
+        if not search_patterns:
+            return []
+
+        return find_references(
+            file_module,
+            file_uri,
+            search_patterns,
+            include_declaration=False,
+            definition_node=None,
+        )
+    except Exception as e:
+        logger.debug("Error scanning file %s for references: %s", file_path, e)
+        return []
+
+
 def get_all_references(
     get_module_func,
     workspace,
@@ -387,10 +648,48 @@ def get_all_references(
     modules_dict: dict,
     include_declaration: bool = False,
     workspace_root: Optional[str] = None,
+    scan_module_func=None,
 ) -> List[types.Location]:
     """
     Get all references to the symbol at the given position.
 
+    See iter_all_references for the arguments.
+
+    Returns:
+        List of Location objects for each reference found.
+    """
+    return [
+        location
+        for locations in iter_all_references(
+            get_module_func,
+            workspace,
+            doc,
+            module,
+            position,
+            modules_dict,
+            include_declaration,
+            workspace_root,
+            scan_module_func,
+        )
+        for location in locations
+    ]
+
+
+def iter_all_references(
+    get_module_func,
+    workspace,
+    doc,
+    module: Module,
+    position,
+    modules_dict: dict,
+    include_declaration: bool = False,
+    workspace_root: Optional[str] = None,
+    scan_module_func=None,
+) -> Iterator[List[types.Location]]:
+    """
+    Iterate over the references to the symbol at the given position, one
+    module at a time, so that they can be reported as each module is searched.
+
     Args:
         get_module_func: Function to get a module for a document.
         workspace: The LSP workspace.
@@ -400,22 +699,24 @@ def get_all_references(
         modules_dict: Dictionary of all loaded modules (uri -> Module).
         include_declaration: Whether to include the definition itself.
         workspace_root: Root path of the workspace (for scanning additional files).
+        scan_module_func: Function to get a module for a workspace file that
+            is not loaded, defaulting to get_module_func.
 
-    Returns:
-        List of Location objects for each reference found.
+    Yields:
+        Non-empty lists of Location objects, one per module with references.
     """
     from couleuvre.utils import get_attribute_word
     from couleuvre.features.resolve import resolve_symbol_for_word
 
     attribute_word = get_attribute_word(doc, position)
     if not attribute_word:
-        return []
+        return
 
     resolved = resolve_symbol_for_word(
         get_module_func, workspace, doc, module, attribute_word, position
     )
     if not resolved or resolved.node is None:
-        return []
+        return
 
     # Check if this is a local variable (use symbol table entry if available)
     is_local = False
@@ -431,11 +732,11 @@ def get_all_references(
         patterns = build_reference_patterns(resolved.node)
 
     if not patterns:
-        return []
+        return
 
     # For local variables, only search within the containing function
     if is_local and enclosing_function is not None:
-        return find_local_references(
+        local_locations = find_local_references(
             module,
             doc.uri,
             patterns,
@@ -443,18 +744,20 @@ def get_all_references(
             include_declaration,
             resolved.node,
         )
+        if local_locations:
+            yield local_locations
+        return
 
     # For module-level symbols, search across all modules
-    target_path = normalize_path(_module_path(resolved.module, resolved.uri))
+    target_path = _module_path(resolved.module, resolved.uri)
     modules = dict(modules_dict)
     modules.setdefault(doc.uri, module)
     modules.setdefault(resolved.uri, resolved.module)
 
-    locations = []
     searched_paths: Set[str] = set()
 
     for uri, mod in modules.items():
-        module_path = normalize_path(_module_path(mod, uri))
+        module_path = _module_path(mod, uri)
         if not module_path:
             continue
         searched_paths.add(module_path)
@@ -465,31 +768,24 @@ def get_all_references(
             search_patterns = patterns
             definition_node = resolved.node
         elif target_path is not None:
-            aliases = [
-                alias
-                for alias, path in mod.imports.items()
-                if normalize_path(path) == target_path
-            ]
-            for alias in aliases:
+            for alias in _get_import_aliases(mod).get(target_path, ()):
                 search_patterns.extend(prefix_patterns(patterns, alias))
 
         if not search_patterns:
             continue
 
-        locations.extend(
-            find_references(
-                mod,
-                uri,
-                search_patterns,
-                include_declaration,
-                definition_node,
-            )
+        locations = find_references(
+            mod,
+            uri,
+            search_patterns,
+            include_declaration,
+            definition_node,
         )
+        if locations:
+            yield locations
 
     # Scan workspace for additional files that might reference the symbol
     if workspace_root and target_path:
-        from pygls import uris as pygls_uris
-
         # Get search terms for text-based pre-filtering
         search_terms = _get_search_terms(patterns)
         if search_terms:
@@ -498,51 +794,24 @@ def get_all_references(
                 workspace_root, search_terms, searched_paths
             )
 
-            for file_path in candidate_files:
-                try:
-                    file_uri = pygls_uris.from_fs_path(str(file_path))
-                    if file_uri is None:
-                        continue
-
-                    # Parse the file
-                    file_doc = workspace.get_text_document(file_uri)
-                    file_module = get_module_func(
-                        doc=file_doc, workspace_folder=workspace_root
-                    )
-                    if file_module is None:
-                        continue
-
-                    # Find import aliases that reference the target module
-                    aliases = [
-                        alias
-                        for alias, path in file_module.imports.items()
-                        if normalize_path(path) == target_path
-                    ]
-                    if not aliases:
-                        continue
-
-                    # Build prefixed patterns and search
-                    search_patterns = []
-                    for alias in aliases:
-                        search_patterns.extend(prefix_patterns(patterns, alias))
-
-                    if search_patterns:
-                        locations.extend(
-                            find_references(
-                                file_module,
-                                file_uri,
-                                search_patterns,
-                                include_declaration=False,
-                                definition_node=None,
-                            )
-                        )
-                except Exception as e:
-                    logger.debug(
-                        "Error scanning file %s for references: %s", file_path, e
-                    )
-                    continue
-
-    return locations
+            # Parsing a file mostly waits on a Vyper worker, so files are
+            # searched concurrently
+            def search_file(file_path: Path) -> List[types.Location]:
+                return _search_candidate_file(
+                    scan_module_func or get_module_func,
+                    workspace,
+                    file_path,
+                    patterns,
+                    target_path,
+                )
+
+            if len(candidate_files) > 1:
+                results = _get_scan_executor().map(search_file, candidate_files)
+            else:
+                results = map(search_file, candidate_files)
+            for file_locations in results:
+                if file_locations:
+                    yield file_locations
 
 
 def find_local_references(
@@ -575,21 +844,17 @@ def find_local_references(
 
     def _add_location(node: BaseNode) -> None:
         """Add a location if not already seen."""
-        loc = types.Location(uri=uri, range=range_from_node(node))
-        key = (
-            loc.range.start.line,
-            loc.range.start.character,
-            loc.range.end.line,
-            loc.range.end.character,
-        )
+        key = (node.lineno, node.col_offset, node.end_lineno, node.end_col_offset)
         if key not in seen:
             seen.add(key)
-            locations.append(loc)
+            locations.append(types.Location(uri=uri, range=range_from_node(node)))
 
     # Optionally include the declaration itself
     if include_declaration and definition_node is not None:
         _add_location(definition_node)
 
+    compiled_patterns = _compile_patterns(patterns)
+
     # Walk the function's AST to find matching references
     for node in _walk_ast(enclosing_function):
         chain = _extract_chain(node)
@@ -597,7 +862,7 @@ def find_local_references(
             continue
         if definition_node and _is_declaration_node(node, definition_node):
             continue
-        if _matches_pattern(chain, patterns):
+        if _matches_pattern(chain, compiled_patterns):
             _add_location(node)
 
     return locations
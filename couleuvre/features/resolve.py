@@ -6,6 +6,7 @@ across modules, used by both definition and references features.
 """
 
 import logging
+from bisect import bisect_right
 from dataclasses import dataclass
 from typing import List, Optional
 
@@ -31,6 +32,23 @@ class ResolvedSymbol:
     entry: Optional[SymbolEntry] = None  # The symbol table entry, if available
 
 
+def _top_level_node_at(module: Module, line: int) -> Optional[BaseNode]:
+    """
+    Find the node of the module's body spanning the given 1-based line.
+
+    The body is sorted by line and its nodes do not overlap, so the node is
+    found by bisecting their start lines.
+    """
+    starts = module.top_level_starts
+    if starts is None:
+        starts = module.top_level_starts = [node.lineno for node in module.ast.body]
+    index = bisect_right(starts, line) - 1
+    if index < 0:
+        return None
+    node = module.ast.body[index]
+    return node if line <= node.end_lineno else None
+
+
 def _find_enclosing_function(
     module: Module, position: types.Position
 ) -> Optional[nodes.FunctionDef]:
@@ -45,11 +63,8 @@ def _find_enclosing_function(
         The FunctionDef node containing the position, or None if at module level.
     """
     line = position.line + 1  # AST uses 1-based line numbers
-    for node in module.ast.body:
-        if isinstance(node, nodes.FunctionDef):
-            if node.lineno <= line <= node.end_lineno:
-                return node
-    return None
+    node = _top_level_node_at(module, line)
+    return node if isinstance(node, nodes.FunctionDef) else None
 
 
 def _is_inside_declaration_context(module: Module, position: types.Position) -> bool:
@@ -65,12 +80,12 @@ def _is_inside_declaration_context(module: Module, position: types.Position) ->
         True if position is inside a FlagDef, EventDef, or StructDef body.
     """
     line = position.line + 1  # AST uses 1-based line numbers
-    for node in module.ast.body:
-        if isinstance(node, (nodes.FlagDef, nodes.EventDef, nodes.StructDef)):
-            # Check if we're inside this definition but NOT on the declaration line
-            if node.lineno < line <= node.end_lineno:
-                return True
-    return False
+    node = _top_level_node_at(module, line)
+    # Check if we're inside a definition but NOT on the declaration line
+    return (
+        isinstance(node, (nodes.FlagDef, nodes.EventDef, nodes.StructDef))
+        and node.lineno < line
+    )
 
 
 def _is_at_module_level(module: Module, position: types.Position) -> bool:
@@ -85,14 +100,14 @@ def _is_at_module_level(module: Module, position: types.Position) -> bool:
         True if position is at module level, False if nested inside something.
     """
     line = position.line + 1  # AST uses 1-based line numbers
-    for node in module.ast.body:
-        if node.lineno <= line <= node.end_lineno:
-            # Position is within this top-level node
-            # It's module level only if it's on the node's declaration line itself
-            # (not inside a function body, etc.)
-            return line == node.lineno
-    # Not inside any top-level node - must be module level (e.g., blank lines)
-    return True
+    node = _top_level_node_at(module, line)
+    if node is None:
+        # Not inside any top-level node - must be module level (e.g., blank lines)
+        return True
+    # Position is within this top-level node
+    # It's module level only if it's on the node's declaration line itself
+    # (not inside a function body, etc.)
+    return line == node.lineno
 
 
 def _resolve_in_namespace(
@@ -7,11 +7,15 @@ Symbol table construction is handled by the separate visitor module.
 
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from couleuvre.ast import nodes
-from couleuvre.ast.parser import get_json_ast
+from couleuvre.ast.environment import is_environment_ready
+from couleuvre.ast.parser import get_json_ast, get_json_asts
+from couleuvre.ast.worker import MAX_WORKERS
 from couleuvre.features.symbol_table import SymbolTable
 
 logger = logging.getLogger("couleuvre")
@@ -22,6 +26,12 @@ _VERSION_PATTERN = re.compile(
 )
 
 
+def get_pragma_version(source: str) -> Optional[str]:
+    """Get the Vyper version a source asks for in its pragma, if any."""
+    match = _VERSION_PATTERN.search(source)
+    return match.group(1) if match else None
+
+
 def parse_module(
     path: str,
     default_version: Optional[str] = None,
@@ -46,18 +56,174 @@ def parse_module(
     """
     # Use provided source or read from disk
     content = source if source is not None else Path(path).read_text()
-    match = _VERSION_PATTERN.search(content)
-    if match:
-        version = match.group(1)
-    elif default_version is not None:
-        version = default_version
-    else:
+    version = get_pragma_version(content) or default_version
+    if version is None:
         raise ValueError(f"Version not found in {path} and no default provided")
 
     vyper_module = get_json_ast(
         path, version, workspace_path=workspace_path, source=source
     )
+    return _build_module(vyper_module, version, content)
+
+
+def parse_modules(
+    paths: List[str],
+    default_version: Optional[str] = None,
+    workspace_path: Optional[str] = None,
+) -> Dict[str, "Module"]:
+    """
+    Parse several Vyper source files from disk.
+
+    Files are grouped by Vyper version and each group is parsed with a
+    single worker round-trip. Groups of different versions are parsed
+    concurrently.
+
+    Args:
+        paths: Paths to the Vyper source files.
+        default_version: Fallback Vyper version for files without a pragma.
+        workspace_path: Root path for resolving relative imports.
+
+    Returns:
+        Mapping of path to Module. Files that could not be read, have no
+        version, or failed to parse are left out.
+    """
+    paths_by_version, sources = _group_by_version(paths, default_version)
+    return _parse_groups(list(paths_by_version.items()), sources, workspace_path)
+
+
+def parse_workspace(
+    paths: List[str],
+    default_version: Optional[str] = None,
+    workspace_path: Optional[str] = None,
+    chunk_size: int = 4,
+    installed_only: bool = False,
+) -> Dict[str, "Module"]:
+    """
+    Parse many Vyper source files in parallel.
+
+    The files of each Vyper version are split into chunks that are parsed
+    concurrently, each chunk in its own Vyper worker process.
+
+    Args:
+        paths: Paths to the Vyper source files.
+        default_version: Fallback Vyper version for files without a pragma.
+        workspace_path: Root path for resolving relative imports.
+        chunk_size: Number of files per chunk.
+        installed_only: Leave out files of Vyper versions that would need an
+            environment to be created first.
+
+    Returns:
+        Mapping of path to Module, leaving out files that failed to parse.
+    """
+    paths_by_version, sources = _group_by_version(paths, default_version)
+    if installed_only:
+        for version in [v for v in paths_by_version if not is_environment_ready(v)]:
+            skipped = paths_by_version.pop(version)
+            logger.debug(
+                "Not parsing %d files of Vyper %s, which is not installed",
+                len(skipped),
+                version,
+            )
+    groups = [
+        (version, version_paths[i : i + chunk_size])
+        for version, version_paths in paths_by_version.items()
+        for i in range(0, len(version_paths), chunk_size)
+    ]
+    return _parse_groups(groups, sources, workspace_path)
+
+
+_parse_executor: Optional[ThreadPoolExecutor] = None
+_parse_executor_lock = threading.Lock()
+
+
+def _get_parse_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool shared by all batch parses, creating it if needed.
+
+    Threads only wait on Vyper workers, so one per worker is enough.
+    """
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            _parse_executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="couleuvre-parse"
+            )
+        return _parse_executor
+
+
+def _group_by_version(
+    paths: List[str], default_version: Optional[str]
+) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """
+    Group readable files by the Vyper version they are parsed with.
+
+    Returns the groups along with the contents read, by path.
+    """
+    paths_by_version: Dict[str, List[str]] = {}
+    sources: Dict[str, str] = {}
+    for path in paths:
+        try:
+            content = Path(path).read_text()
+        except OSError as e:
+            logger.debug("Could not read %s: %s", path, e)
+            continue
+        version = get_pragma_version(content) or default_version
+        if version is None:
+            logger.debug("Version not found in %s and no default provided", path)
+            continue
+        paths_by_version.setdefault(version, []).append(path)
+        sources[path] = content
+    return paths_by_version, sources
+
+
+def _parse_groups(
+    groups: List[Tuple[str, List[str]]],
+    sources: Dict[str, str],
+    workspace_path: Optional[str],
+) -> Dict[str, "Module"]:
+    """Parse (version, paths) groups, concurrently if there are several."""
+    if len(groups) <= 1:
+        results = [_parse_group(group, sources, workspace_path) for group in groups]
+    else:
+        results = list(
+            _get_parse_executor().map(
+                lambda group: _parse_group(group, sources, workspace_path), groups
+            )
+        )
+
+    modules: Dict[str, Module] = {}
+    for parsed in results:
+        modules.update(parsed)
+    return modules
+
+
+def _parse_group(
+    group: Tuple[str, List[str]],
+    sources: Dict[str, str],
+    workspace_path: Optional[str],
+) -> Dict[str, "Module"]:
+    """Parse files of a single Vyper version with one worker round-trip."""
+    version, paths = group
+    try:
+        vyper_modules = get_json_asts(paths, version, workspace_path=workspace_path)
+    except RuntimeError as e:
+        logger.debug("Could not parse modules for Vyper %s: %s", version, e)
+        return {}
+    return {
+        path: _build_module(vyper_module, version, sources.get(path))
+        for path, vyper_module in vyper_modules.items()
+    }
+
+
+def _build_module(
+    vyper_module: nodes.Module, version: str, source: Optional[str]
+) -> "Module":
+    """
+    Wrap a parsed AST in a Module, along with the source it was parsed from,
+    and build its symbol table.
+    """
     module = Module(vyper_module, version)
+    module.source = source
 
     # Build symbol table using the visitor
     from couleuvre.ast.visitor import VyperAstVisitor
@@ -83,6 +249,16 @@ class Module:
         structs: Set of StructDef nodes in this module.
         variables: Set of VariableDecl nodes in this module.
         imports: Mapping of import aliases to resolved file paths.
+        completions: Completion items computed for this module, by kind of
+            completion. A module is rebuilt on every parse, so entries never
+            go stale.
+        reference_index: Nodes of the module by identifier chain, built once
+            for reference searches.
+        import_aliases: Import aliases by normalized imported path, built
+            from imports on the first reference search.
+        source: Source code the module was parsed from, if kept.
+        top_level_starts: Start lines of the nodes of the module's body,
+            gathered on the first lookup of a node by line.
     """
 
     def __init__(self, ast: nodes.Module, vyper_version: str):
@@ -97,6 +273,11 @@ class Module:
         self.structs: Set[nodes.BaseNode] = set()
         self.variables: Set[nodes.BaseNode] = set()
         self.imports: Dict[str, str] = {}
+        self.completions: Dict[str, List[Any]] = {}
+        self.reference_index: Optional[Any] = None
+        self.import_aliases: Optional[Dict[str, List[str]]] = None
+        self.source: Optional[str] = None
+        self.top_level_starts: Optional[List[int]] = None
 
     @property
     def namespace(self) -> Dict[str, Any]:
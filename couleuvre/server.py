@@ -8,7 +8,10 @@ and document symbols.
 
 import asyncio
 import logging
-from typing import Dict, List, Optional
+import os
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from lsprotocol import types
 from pygls import uris
@@ -16,17 +19,31 @@ from pygls.lsp.server import LanguageServer
 from pygls.workspace import TextDocument
 
 from couleuvre import utils
+from couleuvre.ast.environment import (
+    is_environment_ready,
+    prewarm_environment,
+    reset_environments,
+)
+from couleuvre.ast.worker import shutdown_workers
 from couleuvre.features.completion import get_completions
 from couleuvre.features.definition import get_definition_location
 from couleuvre.features.diagnostics import (
     compile_and_get_diagnostics,
+    compile_and_get_diagnostics_batch,
     create_diagnostic,
+    get_diagnostics_result_id,
     parse_error_location,
 )
-from couleuvre.features.references import get_all_references
+from couleuvre.features.references import forget_file, iter_all_references
 from couleuvre.features.symbols import get_document_symbols
 from couleuvre.logger_setup import setup_logging
-from couleuvre.parser import Module, parse_module
+from couleuvre.parser import (
+    Module,
+    get_pragma_version,
+    parse_module,
+    parse_modules,
+    parse_workspace,
+)
 
 logger = logging.getLogger("couleuvre")
 
@@ -36,6 +53,12 @@ PARSE_DEBOUNCE_DELAY = 0.3
 # Debounce delay for full compilation diagnostics (in seconds)
 DIAGNOSTICS_DEBOUNCE_DELAY = 1.0
 
+# Number of documents compiled per worker round-trip for workspace diagnostics
+DIAGNOSTICS_BATCH_SIZE = 4
+
+# Maximum number of modules of unloaded files kept for reference searches
+SCANNED_MODULES_CACHE_SIZE = 64
+
 
 class VyperLanguageServer(LanguageServer):
     """Language server implementation for Vyper smart contracts."""
@@ -43,6 +66,15 @@ class VyperLanguageServer(LanguageServer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.modules: Dict[str, Module] = {}
+        # Guards the module cache and the parse state below, which documents
+        # parsed on worker threads (e.g. when searching references) update
+        self._modules_lock = threading.Lock()
+        # Modules of workspace files parsed by reference searches without
+        # being loaded, by path, each stored alongside the (mtime_ns, size)
+        # of the file they were parsed from
+        self._scanned_modules: "OrderedDict[str, Tuple[Tuple[int, int], Module]]" = (
+            OrderedDict()
+        )
         self.logger = setup_logging(self)
         self.logger.info("Vyper Language Server starting...")
         installed_version = utils.get_installed_vyper_version()
@@ -53,8 +85,29 @@ class VyperLanguageServer(LanguageServer):
         self._parse_tasks: Dict[str, asyncio.Task] = {}
         # Debounce timers for full compilation diagnostics
         self._diagnostics_tasks: Dict[str, asyncio.Task] = {}
+        # Documents with a pushed parse error, when the client pulls diagnostics
+        self._pushed_parse_errors: Set[str] = set()
+        # Vyper AST errors of documents, with the source that raised them
+        self._parse_errors: Dict[str, Tuple[str, types.Diagnostic]] = {}
         # Main event loop used for scheduling tasks from worker threads
         self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Whether every workspace file is parsed on startup, an opt-in
+        # initialization option ("parseWorkspace")
+        self.parse_workspace_on_start = False
+
+    @property
+    def pull_diagnostics(self) -> bool:
+        """
+        Whether the client pulls diagnostics (textDocument/diagnostic).
+
+        Full compilation diagnostics are then computed on request only, for
+        the documents the client shows, instead of being pushed on every
+        change. AST-level errors are still pushed.
+        """
+        # Capabilities are only known once the client initialized the server
+        capabilities = getattr(self.protocol, "client_capabilities", None)
+        text_document = capabilities.text_document if capabilities else None
+        return text_document is not None and text_document.diagnostic is not None
 
     def publish_diagnostics(
         self, uri: str, diagnostics: List[types.Diagnostic]
@@ -82,15 +135,23 @@ class VyperLanguageServer(LanguageServer):
             True if parsing succeeded, False otherwise.
         """
         try:
-            self.modules[doc.uri] = parse_module(
+            module = parse_module(
                 doc.path,
                 default_version=self.default_version,
                 workspace_path=workspace_path,
                 source=doc.source,
             )
-            if not self.default_version:
-                self.default_version = self.modules[doc.uri].version
+            with self._modules_lock:
+                self.modules[doc.uri] = module
+                if not self.default_version:
+                    self.default_version = module.version
+                self._parse_errors.pop(doc.uri, None)
+                pushed_parse_error = doc.uri in self._pushed_parse_errors
+                self._pushed_parse_errors.discard(doc.uri)
             self.logger.debug("Parsed module: %s", doc.uri)
+            if pushed_parse_error:
+                # Pulled diagnostics do not replace pushed ones
+                self.clear_diagnostics(doc.uri)
             return True
         except ValueError as e:
             # Missing or invalid version pragma
@@ -101,6 +162,12 @@ class VyperLanguageServer(LanguageServer):
         except RuntimeError as e:
             # Vyper compiler error (AST stage)
             self.logger.warning("Vyper AST parsing failed for %s: %s", doc.uri, e)
+            # Compiling this source would fail the same way
+            with self._modules_lock:
+                self._parse_errors[doc.uri] = (
+                    doc.source,
+                    _parse_error_diagnostic(str(e)),
+                )
             self._publish_parse_error(doc.uri, str(e), is_version_error=False)
             # Keep the last valid module for completion/navigation
             return False
@@ -115,18 +182,17 @@ class VyperLanguageServer(LanguageServer):
         self, uri: str, message: str, is_version_error: bool = False
     ) -> None:
         """Publish a diagnostic for a parse error."""
+        if self.pull_diagnostics and not is_version_error and uri in self.modules:
+            # The diagnostics pulled by the client report this error as well
+            return
+
         # For version errors, suggest adding a pragma
         if is_version_error:
             message = f"{message}. Add '#pragma version ^0.4.0' at the top of the file."
 
-        line, col = parse_error_location(message)
-        diagnostic = create_diagnostic(
-            message=message,
-            start_line=line,
-            start_col=col,
-            source="couleuvre",
-        )
-        self.publish_diagnostics(uri, [diagnostic])
+        self.publish_diagnostics(uri, [_parse_error_diagnostic(message)])
+        if self.pull_diagnostics:
+            self._pushed_parse_errors.add(uri)
 
     def schedule_diagnostics(
         self, doc: TextDocument, workspace_path: Optional[str] = None
@@ -139,10 +205,12 @@ class VyperLanguageServer(LanguageServer):
         to avoid excessive compilation on every keystroke.
         """
         uri = doc.uri
+        if self.pull_diagnostics:
+            # The client requests the diagnostics of the documents it shows
+            return
 
         # Cancel any pending diagnostics task for this document
-        if uri in self._diagnostics_tasks:
-            self._diagnostics_tasks[uri].cancel()
+        self.cancel_diagnostics(uri)
 
         # Schedule a new diagnostics task
         async def run_diagnostics_after_delay():
@@ -152,11 +220,25 @@ class VyperLanguageServer(LanguageServer):
             except asyncio.CancelledError:
                 # Task was cancelled due to new edits, this is expected
                 pass
+            finally:
+                if self._diagnostics_tasks.get(uri) is asyncio.current_task():
+                    del self._diagnostics_tasks[uri]
 
         self._diagnostics_tasks[uri] = asyncio.create_task(
             run_diagnostics_after_delay()
         )
 
+    def cancel_diagnostics(self, uri: str) -> None:
+        """
+        Cancel the scheduled diagnostics of a document, if any.
+
+        A compilation already running in a Vyper worker completes, but its
+        diagnostics are not published.
+        """
+        task = self._diagnostics_tasks.pop(uri, None)
+        if task is not None:
+            task.cancel()
+
     def schedule_parse(
         self, doc: TextDocument, workspace_path: Optional[str] = None
     ) -> None:
@@ -169,8 +251,7 @@ class VyperLanguageServer(LanguageServer):
         uri = doc.uri
 
         # Cancel any pending parse task for this document
-        if uri in self._parse_tasks:
-            self._parse_tasks[uri].cancel()
+        self.cancel_parse(uri)
 
         # Schedule a new parse task
         async def run_parse_after_delay():
@@ -181,9 +262,18 @@ class VyperLanguageServer(LanguageServer):
             except asyncio.CancelledError:
                 # Task was cancelled due to new edits, this is expected
                 pass
+            finally:
+                if self._parse_tasks.get(uri) is asyncio.current_task():
+                    del self._parse_tasks[uri]
 
         self._parse_tasks[uri] = asyncio.create_task(run_parse_after_delay())
 
+    def cancel_parse(self, uri: str) -> None:
+        """Cancel the scheduled parse of a document, if any."""
+        task = self._parse_tasks.pop(uri, None)
+        if task is not None:
+            task.cancel()
+
     def schedule_import_parsing(
         self, module: Module, workspace_path: Optional[str] = None
     ) -> None:
@@ -191,7 +281,8 @@ class VyperLanguageServer(LanguageServer):
         Schedule background parsing of all imports in a module.
 
         This pre-parses imported modules so that completion and navigation
-        for imported symbols is instant.
+        for imported symbols is instant. Pending imports are parsed together
+        in a single batch.
         """
         try:
             running_loop = asyncio.get_running_loop()
@@ -199,6 +290,7 @@ class VyperLanguageServer(LanguageServer):
         except RuntimeError:
             running_loop = self._event_loop
 
+        pending: Dict[str, str] = {}
         for _import_name, resolved_path in module.imports.items():
             uri = uris.from_fs_path(resolved_path)
             if not uri:
@@ -207,74 +299,313 @@ class VyperLanguageServer(LanguageServer):
             # Skip if already parsed
             if uri in self.modules:
                 continue
+            pending[uri] = resolved_path
 
-            # Schedule background parsing
-            async def parse_import(import_uri: str, import_path: str) -> None:
-                try:
-                    # Small delay to not compete with main document parsing
-                    await asyncio.sleep(0.1)
-                    self.logger.debug("Background parsing import: %s", import_path)
-                    await asyncio.to_thread(
-                        self._parse_import, import_uri, import_path, workspace_path
-                    )
-                except asyncio.CancelledError:
-                    pass
-                except Exception as e:
-                    self.logger.debug("Failed to parse import %s: %s", import_path, e)
-
-            if not running_loop or not running_loop.is_running():
-                # If no event loop is available (for example during tests), parse inline.
-                self._parse_import(uri, resolved_path, workspace_path)
-                continue
+        if not pending:
+            return
+        imports = list(pending.items())
 
-            def _schedule_task(
-                import_uri: str = uri, import_path: str = resolved_path
-            ) -> None:
-                coro = parse_import(import_uri, import_path)
-                try:
-                    running_loop.create_task(coro)
-                except RuntimeError:
-                    coro.close()
-                    self._parse_import(import_uri, import_path, workspace_path)
+        # Schedule background parsing
+        async def parse_imports() -> None:
+            try:
+                # Small delay to not compete with main document parsing
+                await asyncio.sleep(0.1)
+                self.logger.debug("Background parsing %d imports", len(imports))
+                await asyncio.to_thread(self._parse_imports, imports, workspace_path)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self.logger.debug("Failed to parse imports: %s", e)
 
+        if not running_loop or not running_loop.is_running():
+            # If no event loop is available (for example during tests), parse inline.
+            self._parse_imports(imports, workspace_path)
+            return
+
+        def _schedule_task() -> None:
+            coro = parse_imports()
             try:
-                try:
-                    current_loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    current_loop = None
-
-                if current_loop is running_loop:
-                    _schedule_task()
-                else:
-                    running_loop.call_soon_threadsafe(_schedule_task)
+                running_loop.create_task(coro)
             except RuntimeError:
-                self._parse_import(uri, resolved_path, workspace_path)
+                coro.close()
+                self._parse_imports(imports, workspace_path)
+
+        try:
+            try:
+                current_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                current_loop = None
+
+            if current_loop is running_loop:
+                _schedule_task()
+            else:
+                running_loop.call_soon_threadsafe(_schedule_task)
+        except RuntimeError:
+            self._parse_imports(imports, workspace_path)
 
-    def _parse_import(
-        self, uri: str, path: str, workspace_path: Optional[str] = None
+    def _parse_imports(
+        self, imports: List[Tuple[str, str]], workspace_path: Optional[str] = None
     ) -> None:
         """
-        Parse an imported module and cache it.
+        Parse imported modules in one batch and cache them.
 
         This is a simplified version of parse() that doesn't publish diagnostics.
+
+        Args:
+            imports: (uri, path) pairs of the imported modules.
+            workspace_path: Root path for resolving relative imports.
         """
-        if uri in self.modules:
+        pending = [(uri, path) for uri, path in imports if uri not in self.modules]
+        if not pending:
             return
 
         try:
-            module = parse_module(
-                path,
+            parsed = parse_modules(
+                [path for _uri, path in pending],
                 default_version=self.default_version,
                 workspace_path=workspace_path,
             )
-            self.modules[uri] = module
+        except Exception as e:
+            # Silently fail for imports - they may not be valid standalone
+            self.logger.debug("Could not parse imports: %s", e)
+            return
+
+        for uri, path in pending:
+            module = parsed.get(path)
+            if module is None:
+                self.logger.debug("Could not parse import %s", path)
+                continue
+            with self._modules_lock:
+                self.modules[uri] = module
             self.logger.debug("Cached import module: %s", uri)
 
             # Recursively parse imports of this module
             self.schedule_import_parsing(module, workspace_path)
-        except Exception as e:
-            # Silently fail for imports - they may not be valid standalone
-            self.logger.debug("Could not parse import %s: %s", path, e)
+
+    def schedule_prewarm(self, vyper_version: Optional[str]) -> None:
+        """
+        Prepare the environment of a Vyper version in the background.
+
+        Creating a managed environment and importing Vyper in a worker can
+        take seconds; doing it ahead of time keeps the first parse fast.
+        Parses requested meanwhile wait for the environment to be ready.
+        """
+        if not vyper_version:
+            return
+
+        async def prewarm() -> None:
+            try:
+                await asyncio.to_thread(prewarm_environment, vyper_version)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self.logger.debug("Failed to prepare Vyper %s: %s", vyper_version, e)
+
+        asyncio.create_task(prewarm())
+
+    def schedule_workspace_prewarm(self, workspace_path: Optional[str]) -> None:
+        """
+        Prepare in the background the environment of the Vyper version most
+        workspace files ask for in their pragma, or of the default version if
+        none does.
+        """
+
+        async def prewarm() -> None:
+            try:
+                version = await asyncio.to_thread(
+                    self._find_workspace_version, workspace_path
+                )
+            except asyncio.CancelledError:
+                return
+            self.schedule_prewarm(version or self.default_version)
+
+        asyncio.create_task(prewarm())
+
+    def _find_workspace_version(self, workspace_path: Optional[str]) -> Optional[str]:
+        """Get the Vyper version most workspace files ask for in their pragma."""
+        if not workspace_path:
+            return None
+        counts: Dict[str, int] = {}
+        for path in utils.find_vyper_files(workspace_path):
+            try:
+                with open(path, errors="replace") as f:
+                    version = get_pragma_version(f.read())
+            except OSError:
+                continue
+            if version is not None:
+                counts[version] = counts.get(version, 0) + 1
+        return max(counts, key=counts.__getitem__) if counts else None
+
+    def open_document(self, doc: TextDocument, workspace_path: Optional[str]) -> None:
+        """
+        Parse an opened document, then load its imports and schedule its
+        diagnostics.
+
+        If the Vyper version of the document is not installed yet, creating
+        its environment takes seconds: the environment is prepared and the
+        document parsed in the background instead of blocking the server.
+        """
+        version = get_pragma_version(doc.source) or self.default_version
+        if version is None or is_environment_ready(version):
+            self.parse(doc, workspace_path)
+            self._on_document_parsed(doc, workspace_path)
+            return
+
+        self.schedule_prewarm(version)
+        uri = doc.uri
+        self.cancel_parse(uri)
+
+        async def parse_when_ready() -> None:
+            try:
+                await asyncio.to_thread(self.parse, doc, workspace_path)
+                self._on_document_parsed(doc, workspace_path)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                if self._parse_tasks.get(uri) is asyncio.current_task():
+                    del self._parse_tasks[uri]
+
+        self._parse_tasks[uri] = asyncio.create_task(parse_when_ready())
+
+    def _on_document_parsed(
+        self, doc: TextDocument, workspace_path: Optional[str]
+    ) -> None:
+        """
+        Load the imports of a document that was parsed, successfully or not,
+        and schedule its diagnostics.
+        """
+        module = self.modules.get(doc.uri)
+        if module is not None:
+            # Background parsing of imports for instant completion
+            self.schedule_import_parsing(module, workspace_path=workspace_path)
+        # Full compilation diagnostics (debounced)
+        self.schedule_diagnostics(doc, workspace_path=workspace_path)
+
+    def schedule_workspace_parsing(self, workspace_path: Optional[str]) -> None:
+        """
+        Schedule background parsing of every Vyper file in the workspace.
+
+        This lets references and navigation see modules that were never
+        opened or imported by an open document. Only files of Vyper versions
+        that are already installed are parsed: environments are not created
+        for versions the user did not ask for.
+        """
+        if not workspace_path:
+            return
+
+        async def parse_workspace_files() -> None:
+            try:
+                await asyncio.to_thread(self._parse_workspace, workspace_path)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self.logger.debug("Failed to parse workspace: %s", e)
+
+        asyncio.create_task(parse_workspace_files())
+
+    def _parse_workspace(self, workspace_path: str) -> None:
+        """Parse all workspace files that are not cached yet, in parallel."""
+        pending: Dict[str, str] = {}
+        for path in utils.find_vyper_files(workspace_path):
+            uri = uris.from_fs_path(path)
+            if uri and uri not in self.modules:
+                pending[path] = uri
+        if not pending:
+            return
+
+        self.logger.info("Parsing %d workspace files", len(pending))
+        parsed = parse_workspace(
+            list(pending),
+            default_version=self.default_version,
+            workspace_path=workspace_path,
+            installed_only=True,
+        )
+        with self._modules_lock:
+            for path, module in parsed.items():
+                # Documents parsed meanwhile (e.g. opened buffers) take precedence
+                self.modules.setdefault(pending[path], module)
+        self.logger.info("Parsed %d workspace files", len(parsed))
+
+    def forget_disk_module(self, uri: str) -> None:
+        """
+        Forget the module parsed from a file that changed on disk, so that it
+        is parsed again when next needed. Open documents are kept: their
+        buffer, not the disk, is what they were parsed from.
+        """
+        if uri in self.workspace.text_documents:
+            return
+        with self._modules_lock:
+            dropped = self.modules.pop(uri, None)
+            path = uris.to_fs_path(uri)
+            if path is not None:
+                self._scanned_modules.pop(path, None)
+        if dropped is not None:
+            self.logger.debug("Dropped module changed on disk: %s", uri)
+
+    def get_scanned_module(
+        self, doc: TextDocument, workspace_path: Optional[str] = None
+    ) -> Optional[Module]:
+        """
+        Get the module of a workspace file searched for references.
+
+        Loaded modules are reused. Other files are parsed from disk without
+        side effects: no diagnostics are published and the module is not
+        loaded. Files of Vyper versions that are not installed are skipped,
+        so that a search never creates an environment. Parsed modules are
+        kept in a bounded cache until their file changes.
+        """
+        module = self.modules.get(doc.uri)
+        if module is not None:
+            return module
+        try:
+            stat = os.stat(doc.path)
+        except OSError:
+            return None
+        file_state = (stat.st_mtime_ns, stat.st_size)
+        with self._modules_lock:
+            cached = self._scanned_modules.get(doc.path)
+            if cached is not None and cached[0] == file_state:
+                self._scanned_modules.move_to_end(doc.path)
+                return cached[1]
+
+        module = parse_workspace(
+            [doc.path],
+            default_version=self.default_version,
+            workspace_path=workspace_path,
+            installed_only=True,
+        ).get(doc.path)
+        if module is None:
+            return None
+        with self._modules_lock:
+            self._scanned_modules[doc.path] = (file_state, module)
+            self._scanned_modules.move_to_end(doc.path)
+            while len(self._scanned_modules) > SCANNED_MODULES_CACHE_SIZE:
+                self._scanned_modules.popitem(last=False)
+        return module
+
+    def watch_vyper_files(self) -> None:
+        """Ask the client to report changes to Vyper files on disk."""
+        capabilities = getattr(self.protocol, "client_capabilities", None)
+        workspace = capabilities.workspace if capabilities else None
+        watched_files = workspace.did_change_watched_files if workspace else None
+        if watched_files is None or not watched_files.dynamic_registration:
+            return
+
+        self.client_register_capability(
+            types.RegistrationParams(
+                registrations=[
+                    types.Registration(
+                        id="couleuvre-watched-files",
+                        method=types.WORKSPACE_DID_CHANGE_WATCHED_FILES,
+                        register_options=types.DidChangeWatchedFilesRegistrationOptions(
+                            watchers=[
+                                types.FileSystemWatcher(glob_pattern="**/*.{vy,vyi}")
+                            ]
+                        ),
+                    )
+                ]
+            )
+        )
 
     async def _run_full_diagnostics(
         self, doc: TextDocument, workspace_path: Optional[str] = None
@@ -284,11 +615,52 @@ class VyperLanguageServer(LanguageServer):
 
         This is run in the background after a debounce delay.
         """
+        diagnostics = await self.get_full_diagnostics(doc, workspace_path)
+        if diagnostics is None:
+            return
+
+        self.publish_diagnostics(doc.uri, diagnostics)
+        self.logger.debug("Published %d diagnostics for %s", len(diagnostics), doc.uri)
+
+    def get_import_closure(self, module: Module) -> List[str]:
+        """
+        Get the paths of the modules a module imports, directly or through
+        other modules, as far as they are loaded. Vyper compiles the whole
+        import graph, so a change to any of them can change the diagnostics.
+        """
+        paths: Dict[str, None] = {}
+        pending = list(module.imports.values())
+        while pending:
+            path = pending.pop()
+            if path in paths:
+                continue
+            paths[path] = None
+            uri = uris.from_fs_path(path)
+            imported = self.modules.get(uri) if uri else None
+            if imported is not None:
+                pending.extend(imported.imports.values())
+        return list(paths)
+
+    async def get_full_diagnostics(
+        self, doc: TextDocument, workspace_path: Optional[str] = None
+    ) -> Optional[List[types.Diagnostic]]:
+        """
+        Run full Vyper compilation of a document and return its diagnostics.
+
+        Returns:
+            The diagnostics, or None if the document could not be compiled
+            (AST-level diagnostics are published by parse in that case).
+        """
         # Get the Vyper version from the parsed module or default
         module = self.modules.get(doc.uri)
         if module is None:
             # If AST parsing failed, we already have diagnostics
-            return
+            return None
+
+        parse_error = self._get_parse_error(doc)
+        if parse_error is not None:
+            # Vyper does not get past parsing, no need to compile
+            return [parse_error]
 
         version = module.version
 
@@ -298,22 +670,80 @@ class VyperLanguageServer(LanguageServer):
 
         try:
             # Run compilation in a thread to avoid blocking the event loop
-            diagnostics = await asyncio.to_thread(
+            return await asyncio.to_thread(
                 compile_and_get_diagnostics,
                 doc.path,
                 version,
                 workspace_path,
                 doc.source,
-            )
-
-            # Publish the diagnostics
-            self.publish_diagnostics(doc.uri, diagnostics)
-            self.logger.debug(
-                "Published %d diagnostics for %s", len(diagnostics), doc.uri
+                self.get_import_closure(module),
             )
         except Exception as e:
             self.logger.error("Full diagnostics failed for %s: %s", doc.uri, e)
             # Don't publish error - we already have AST-level diagnostics if needed
+            return None
+
+    async def iter_open_documents_diagnostics(
+        self, workspace_path: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, List[types.Diagnostic]]]:
+        """
+        Run full Vyper compilation of all the open parsed documents and yield
+        their diagnostics by uri, batch by batch as they complete.
+
+        The documents of each Vyper version are split into batches compiled
+        with a single worker round-trip each, and batches run concurrently,
+        so that a slow file only holds back the documents of its own batch.
+        """
+        parse_errors: Dict[str, List[types.Diagnostic]] = {}
+        docs_by_version: Dict[str, List[TextDocument]] = {}
+        for uri, doc in self.workspace.text_documents.items():
+            module = self.modules.get(uri)
+            if module is None:
+                continue
+            parse_error = self._get_parse_error(doc)
+            if parse_error is not None:
+                # Vyper does not get past parsing, no need to compile
+                parse_errors[uri] = [parse_error]
+            else:
+                docs_by_version.setdefault(module.version, []).append(doc)
+        if parse_errors:
+            yield parse_errors
+
+        async def compile_batch(
+            version: str, docs: List[TextDocument]
+        ) -> Dict[str, List[types.Diagnostic]]:
+            dependencies = {
+                doc.path: self.get_import_closure(self.modules[doc.uri]) for doc in docs
+            }
+            try:
+                by_path = await asyncio.to_thread(
+                    compile_and_get_diagnostics_batch,
+                    [(doc.path, doc.source) for doc in docs],
+                    version,
+                    workspace_path,
+                    dependencies,
+                )
+            except Exception as e:
+                self.logger.error(
+                    "Full diagnostics failed for vyper %s: %s", version, e
+                )
+                return {}
+            return {doc.uri: by_path[doc.path] for doc in docs if doc.path in by_path}
+
+        batches = [
+            compile_batch(version, docs[i : i + DIAGNOSTICS_BATCH_SIZE])
+            for version, docs in docs_by_version.items()
+            for i in range(0, len(docs), DIAGNOSTICS_BATCH_SIZE)
+        ]
+        for batch in asyncio.as_completed(batches):
+            yield await batch
+
+    def _get_parse_error(self, doc: TextDocument) -> Optional[types.Diagnostic]:
+        """Return the Vyper AST error of the current source of a document."""
+        parse_error = self._parse_errors.get(doc.uri)
+        if parse_error is not None and parse_error[0] == doc.source:
+            return parse_error[1]
+        return None
 
     def get_module(
         self, doc: TextDocument, workspace_path: Optional[str] = None
@@ -332,6 +762,17 @@ class VyperLanguageServer(LanguageServer):
         return self.modules.get(doc.uri)
 
 
+def _parse_error_diagnostic(message: str) -> types.Diagnostic:
+    """Create the diagnostic of a document that could not be parsed."""
+    line, col = parse_error_location(message)
+    return create_diagnostic(
+        message=message,
+        start_line=line,
+        start_col=col,
+        source="couleuvre",
+    )
+
+
 server = VyperLanguageServer("couleuvre", "v0.0.4")
 
 
@@ -340,19 +781,59 @@ server = VyperLanguageServer("couleuvre", "v0.0.4")
 # -----------------------------------------------------------------------------
 
 
+@server.feature(types.INITIALIZED)
+def initialized(ls: VyperLanguageServer, params: types.InitializedParams) -> None:
+    """
+    Prepare Vyper in the background, watch Vyper files on disk and, if asked
+    to, parse the workspace.
+    """
+    ls.schedule_workspace_prewarm(ls.workspace.root_path)
+    ls.watch_vyper_files()
+    if ls.parse_workspace_on_start:
+        ls.schedule_workspace_parsing(ls.workspace.root_path)
+
+
+@server.feature(types.INITIALIZE)
+def initialize(ls: VyperLanguageServer, params: types.InitializeParams) -> None:
+    """Read the initialization options of the client."""
+    options = params.initialization_options
+    if isinstance(options, dict):
+        ls.parse_workspace_on_start = bool(options.get("parseWorkspace", False))
+
+
+@server.feature(types.WORKSPACE_DID_CHANGE_WATCHED_FILES)
+def did_change_watched_files(
+    ls: VyperLanguageServer, params: types.DidChangeWatchedFilesParams
+) -> None:
+    """Forget the modules and search data of Vyper files that changed on disk."""
+    for change in params.changes:
+        ls.forget_disk_module(change.uri)
+        path = uris.to_fs_path(change.uri)
+        if path is not None:
+            forget_file(path)
+
+
+@server.feature(types.SHUTDOWN)
+def shutdown(ls: VyperLanguageServer, params: None) -> None:
+    """Stop the Vyper workers when the client shuts the server down."""
+    shutdown_workers()
+
+
+@server.feature(types.WORKSPACE_DID_CHANGE_CONFIGURATION)
+def did_change_configuration(
+    ls: VyperLanguageServer, params: types.DidChangeConfigurationParams
+) -> None:
+    """Resolve Vyper environments again, in case the user switched them."""
+    ls.logger.debug("Configuration changed")
+    reset_environments()
+
+
 @server.feature(types.TEXT_DOCUMENT_DID_OPEN)
 def did_open(ls: VyperLanguageServer, params: types.DidOpenTextDocumentParams) -> None:
     """Parse document when opened and schedule full diagnostics."""
     ls.logger.debug("Document opened: %s", params.text_document.uri)
     doc = ls.workspace.get_text_document(params.text_document.uri)
-    # Fast AST parse for navigation
-    ls.parse(doc, workspace_path=ls.workspace.root_path)
-    # Schedule background parsing of imports for instant completion
-    module = ls.modules.get(doc.uri)
-    if module:
-        ls.schedule_import_parsing(module, workspace_path=ls.workspace.root_path)
-    # Schedule full compilation diagnostics (debounced)
-    ls.schedule_diagnostics(doc, workspace_path=ls.workspace.root_path)
+    ls.open_document(doc, workspace_path=ls.workspace.root_path)
 
 
 @server.feature(types.TEXT_DOCUMENT_DID_CHANGE)
@@ -368,11 +849,107 @@ def did_change(
     ls.schedule_diagnostics(doc, workspace_path=ls.workspace.root_path)
 
 
+@server.feature(types.TEXT_DOCUMENT_DID_CLOSE)
+def did_close(
+    ls: VyperLanguageServer, params: types.DidCloseTextDocumentParams
+) -> None:
+    """Drop the pending work of a closed document."""
+    ls.logger.debug("Document closed: %s", params.text_document.uri)
+    ls.cancel_parse(params.text_document.uri)
+    ls.cancel_diagnostics(params.text_document.uri)
+
+
+@server.feature(
+    types.TEXT_DOCUMENT_DIAGNOSTIC,
+    types.DiagnosticOptions(
+        identifier="vyper",
+        inter_file_dependencies=True,
+        workspace_diagnostics=True,
+    ),
+)
+async def document_diagnostic(
+    ls: VyperLanguageServer, params: types.DocumentDiagnosticParams
+) -> types.DocumentDiagnosticReport:
+    """Return the full compilation diagnostics of a document."""
+    ls.logger.debug("Diagnostics requested: %s", params.text_document.uri)
+    doc = ls.workspace.get_text_document(params.text_document.uri)
+    diagnostics = await ls.get_full_diagnostics(doc, ls.workspace.root_path)
+    if diagnostics is None:
+        diagnostics = []
+
+    result_id = get_diagnostics_result_id(diagnostics)
+    if params.previous_result_id == result_id:
+        return types.RelatedUnchangedDocumentDiagnosticReport(result_id=result_id)
+    return types.RelatedFullDocumentDiagnosticReport(
+        items=diagnostics, result_id=result_id
+    )
+
+
 # -----------------------------------------------------------------------------
 # Symbol Features
 # -----------------------------------------------------------------------------
 
 
+@server.feature(types.WORKSPACE_DIAGNOSTIC)
+async def workspace_diagnostic(
+    ls: VyperLanguageServer, params: types.WorkspaceDiagnosticParams
+) -> types.WorkspaceDiagnosticReport:
+    """
+    Return the full compilation diagnostics of all open documents.
+
+    If the client asked for partial results, the diagnostics of each batch
+    of documents are streamed as soon as it is compiled.
+    """
+    ls.logger.debug("Workspace diagnostics requested")
+    previous_result_ids = {p.uri: p.value for p in params.previous_result_ids}
+
+    items: List[types.WorkspaceDocumentDiagnosticReport] = []
+    async for diagnostics_by_uri in ls.iter_open_documents_diagnostics(
+        ls.workspace.root_path
+    ):
+        batch_items = _workspace_report_items(
+            ls, diagnostics_by_uri, previous_result_ids
+        )
+        if params.partial_result_token is None:
+            items.extend(batch_items)
+        elif batch_items:
+            ls.protocol.notify(
+                types.PROGRESS,
+                types.ProgressParams(
+                    token=params.partial_result_token,
+                    value=types.WorkspaceDiagnosticReportPartialResult(
+                        items=batch_items
+                    ),
+                ),
+            )
+    return types.WorkspaceDiagnosticReport(items=items)
+
+
+def _workspace_report_items(
+    ls: VyperLanguageServer,
+    diagnostics_by_uri: Dict[str, List[types.Diagnostic]],
+    previous_result_ids: Dict[str, str],
+) -> List[types.WorkspaceDocumentDiagnosticReport]:
+    """Build the workspace diagnostic reports of documents."""
+    items: List[types.WorkspaceDocumentDiagnosticReport] = []
+    for uri, diagnostics in diagnostics_by_uri.items():
+        version = ls.workspace.get_text_document(uri).version
+        result_id = get_diagnostics_result_id(diagnostics)
+        if previous_result_ids.get(uri) == result_id:
+            items.append(
+                types.WorkspaceUnchangedDocumentDiagnosticReport(
+                    uri=uri, version=version, result_id=result_id
+                )
+            )
+        else:
+            items.append(
+                types.WorkspaceFullDocumentDiagnosticReport(
+                    uri=uri, version=version, items=diagnostics, result_id=result_id
+                )
+            )
+    return items
+
+
 @server.feature(types.TEXT_DOCUMENT_DOCUMENT_SYMBOL)
 def document_symbol(
     ls: VyperLanguageServer, params: types.DocumentSymbolParams
@@ -456,24 +1033,38 @@ def goto_definition(
 
 
 @server.feature(types.TEXT_DOCUMENT_REFERENCES)
-def goto_references(
+async def goto_references(
     ls: VyperLanguageServer, params: types.ReferenceParams
 ) -> List[types.Location]:
-    """Return all references to the symbol at the cursor."""
+    """
+    Return all references to the symbol at the cursor, streamed one module at
+    a time as partial results when the client supports them.
+
+    Modules are searched one at a time on a worker thread, so that the server
+    keeps handling other messages meanwhile, and a cancelled request stops
+    between two modules.
+    """
     ls.logger.debug("References requested: %s", params.text_document.uri)
     doc = ls.workspace.get_text_document(params.text_document.uri)
-    module = ls.get_module(doc, workspace_path=ls.workspace.root_path)
+    module = await asyncio.to_thread(
+        ls.get_module, doc, workspace_path=ls.workspace.root_path
+    )
     if module is None:
         return []
 
     def get_module_func(d: TextDocument) -> Optional[Module]:
         return ls.get_module(d, workspace_path=ls.workspace.root_path)
 
+    def scan_module_func(d: TextDocument) -> Optional[Module]:
+        return ls.get_scanned_module(d, workspace_path=ls.workspace.root_path)
+
     include_declaration = (
         params.context.include_declaration if params.context else False
     )
 
-    return get_all_references(
+    # Workspace files not loaded yet are searched too, parsed on demand but
+    # not loaded
+    references = iter_all_references(
         get_module_func,
         ls.workspace,
         doc,
@@ -481,4 +1072,27 @@ def goto_references(
         params.position,
         ls.modules,
         include_declaration,
+        workspace_root=ls.workspace.root_path,
+        scan_module_func=scan_module_func,
     )
+
+    def search_next_module() -> Optional[List[types.Location]]:
+        return next(references, None)
+
+    found: List[types.Location] = []
+    while True:
+        # Cancelling the request cancels this await: the module being
+        # searched is finished, but no further one is
+        locations = await asyncio.to_thread(search_next_module)
+        if locations is None:
+            return found
+        if params.partial_result_token is None:
+            found.extend(locations)
+        else:
+            # Report the references of each module as soon as it is searched
+            ls.protocol.notify(
+                types.PROGRESS,
+                types.ProgressParams(
+                    token=params.partial_result_token, value=locations
+                ),
+            )
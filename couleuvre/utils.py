@@ -1,9 +1,12 @@
 """Utility functions for the Vyper Language Server."""
 
 import logging
+import os
 import re
+import threading
+from functools import lru_cache
 from importlib.metadata import version
-from typing import Optional
+from typing import Dict, List, Optional, Pattern, Tuple
 
 from lsprotocol.types import Location, Position, Range
 from packaging.version import Version
@@ -13,9 +16,23 @@ from couleuvre.ast.nodes import BaseNode
 
 logger = logging.getLogger("couleuvre")
 
+VYPER_FILE_SUFFIXES = (".vy", ".vyi")
 
+# Directories never scanned for Vyper sources: VCS metadata, the project
+# virtualenv and caches. Anything else is left to the .gitignore.
+_IGNORED_DIRECTORIES = {".git", ".venv", "node_modules", "__pycache__"}
+
+# Directories nested deeper than this are not scanned for Vyper sources
+_MAX_SEARCH_DEPTH = 20
+
+
+@lru_cache(maxsize=None)
 def get_installed_vyper_version() -> Optional[Version]:
-    """Get the version of Vyper installed in the current environment."""
+    """
+    Get the version of Vyper installed in the current environment.
+
+    The lookup reads package metadata, so it is done once per session.
+    """
     try:
         return Version(version("vyper"))
     except Exception:
@@ -63,3 +80,174 @@ def get_attribute_word(doc: TextDocument, position: Position) -> Optional[str]:
     except IndexError:
         return None
     return attribute_word
+
+
+# A compiled ignore pattern: (pattern, negated, anchored, directory_only)
+_IgnorePattern = Tuple[Pattern[str], bool, bool, bool]
+
+# Patterns of the ignore files read, by path, each stored alongside the
+# (mtime_ns, size) of the file they were read from
+_ignore_file_cache: Dict[str, Tuple[Tuple[int, int], List[_IgnorePattern]]] = {}
+_ignore_file_cache_lock = threading.Lock()
+
+# Trailing spaces of an ignore pattern, which are dropped unless escaped
+_TRAILING_SPACES_PATTERN = re.compile(r"(?<!\\) +$")
+
+
+def _compile_gitignore_pattern(pattern: str) -> Pattern[str]:
+    """Compile a .gitignore glob, where only '**' matches across directories."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        elif pattern[i] == "[":
+            start = i + 1
+            negated = pattern.startswith(("!", "^"), start)
+            if negated:
+                start += 1
+            # A ']' right after the opening bracket is a member of the class
+            end = pattern.find("]", start + 1)
+            if end == -1:
+                parts.append(re.escape("["))
+                i += 1
+                continue
+            members = "".join(
+                "\\" + char if char in "\\[]" else char for char in pattern[start:end]
+            )
+            # Like a wildcard, a negated class does not match a separator
+            parts.append("[^/" + members + "]" if negated else "[" + members + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts))
+
+
+def _parse_ignore_lines(lines: List[str]) -> List[_IgnorePattern]:
+    """Compile the patterns of the lines of an ignore file."""
+    patterns: List[_IgnorePattern] = []
+    for line in lines:
+        line = _TRAILING_SPACES_PATTERN.sub("", line)
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            pattern = _compile_gitignore_pattern(line.lstrip("/"))
+            patterns.append((pattern, negated, "/" in line, directory_only))
+    return patterns
+
+
+def _read_ignore_file(path: str) -> List[_IgnorePattern]:
+    """
+    Read the patterns of an ignore file (.gitignore, .git/info/exclude), only
+    parsing it again if it changed since the last call. Anchored patterns are
+    matched against paths relative to the directory of the file, the others
+    against names.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+    file_state = (stat.st_mtime_ns, stat.st_size)
+    with _ignore_file_cache_lock:
+        cached = _ignore_file_cache.get(path)
+    if cached is not None and cached[0] == file_state:
+        return cached[1]
+
+    try:
+        with open(path, errors="replace") as f:
+            patterns = _parse_ignore_lines(f.read().splitlines())
+    except OSError:
+        return []
+    with _ignore_file_cache_lock:
+        _ignore_file_cache[path] = (file_state, patterns)
+    return patterns
+
+
+def _is_gitignored(
+    relative_path: str,
+    is_directory: bool,
+    layers: List[Tuple[str, List[_IgnorePattern]]],
+) -> bool:
+    """
+    Check if a path is ignored by the patterns of ignore files, given as
+    (directory prefix, patterns) layers from the root down: the last match
+    wins, so deeper files override the ones above them.
+    """
+    ignored = False
+    for prefix, patterns in layers:
+        path = relative_path[len(prefix) :]
+        name = path.rpartition("/")[2]
+        for pattern, negated, anchored, directory_only in patterns:
+            if directory_only and not is_directory:
+                continue
+            if pattern.fullmatch(path if anchored else name):
+                ignored = not negated
+    return ignored
+
+
+def find_vyper_files(root: str) -> List[str]:
+    """
+    Find all Vyper source files (.vy, .vyi) under a directory.
+
+    Well-known metadata/dependency/cache directories, paths ignored by the
+    .gitignore files found along the way or by .git/info/exclude, and
+    directories nested too deep are skipped.
+
+    Ignore files support the usual wildcards, '**', character classes
+    (negated with '!' or '^'), backslash escapes, negated and directory-only
+    patterns. Ignore files outside of the directory, e.g. global excludes,
+    are not read.
+    """
+    root_patterns = _read_ignore_file(
+        os.path.join(root, ".git", "info", "exclude")
+    ) + _read_ignore_file(os.path.join(root, ".gitignore"))
+    # Ignore patterns applying to the entries of each directory to walk
+    layers_by_directory = {root: [("", root_patterns)] if root_patterns else []}
+    vyper_files: List[str] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        layers = layers_by_directory.pop(dirpath, [])
+        relative_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        if relative_dir == ".":
+            prefix, depth = "", 0
+        else:
+            prefix, depth = relative_dir + "/", relative_dir.count("/") + 1
+            patterns = _read_ignore_file(os.path.join(dirpath, ".gitignore"))
+            if patterns:
+                layers = layers + [(prefix, patterns)]
+
+        if depth >= _MAX_SEARCH_DEPTH:
+            dirnames[:] = []
+        else:
+            dirnames[:] = [
+                d
+                for d in dirnames
+                if d not in _IGNORED_DIRECTORIES
+                and not (layers and _is_gitignored(prefix + d, True, layers))
+            ]
+            for d in dirnames:
+                layers_by_directory[os.path.join(dirpath, d)] = layers
+        for filename in filenames:
+            if filename.endswith(VYPER_FILE_SUFFIXES) and not (
+                layers and _is_gitignored(prefix + filename, False, layers)
+            ):
+                vyper_files.append(os.path.join(dirpath, filename))
+    return vyper_files
@@ -2,6 +2,7 @@
 Shared test fixtures and utilities for Couleuvre tests.
 """
 
+import asyncio
 import tempfile
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
@@ -180,7 +181,7 @@ class VyperTestHarness:
             position=Position(line=line, character=character),
             context=ReferenceContext(include_declaration=include_declaration),
         )
-        return goto_references(self.ls, params)
+        return asyncio.run(goto_references(self.ls, params))
 
     def assert_definition_at(
         self,
@@ -7,6 +7,7 @@ from lsprotocol.types import CompletionItemKind
 
 from couleuvre.ast import nodes
 from couleuvre.features.completion import (
+    get_module_completions,
     get_self_completions,
     _get_trigger_context,
     _is_internal_function,
@@ -170,6 +171,22 @@ def get_counter() -> uint256:
         assert helper_comp.insert_text == "_helper($0)"
         assert helper_comp.insert_text_format == InsertTextFormat.Snippet
 
+    def test_completions_computed_once_per_module(
+        self, module_with_vars_and_funcs, monkeypatch
+    ):
+        """Test that completions are reused until the module is re-parsed."""
+        from couleuvre.features import completion
+
+        first = get_self_completions(module_with_vars_and_funcs)
+
+        def fail(func):
+            raise AssertionError("completions were recomputed")
+
+        monkeypatch.setattr(completion, "_is_internal_function", fail)
+        second = get_self_completions(module_with_vars_and_funcs)
+
+        assert [c.label for c in second] == [c.label for c in first]
+
 
 class TestIsInternalFunction:
     """Tests for _is_internal_function helper."""
@@ -241,3 +258,52 @@ def _helper():
         func = list(module.functions)[0]
         assert isinstance(func, nodes.FunctionDef)
         assert _is_internal_function(func) is True
+
+
+class TestModuleCompletions:
+    """Tests for get_module_completions function."""
+
+    def test_completions_computed_once_per_imported_module(self, tmp_path, monkeypatch):
+        """Test that an imported module's items are reused across requests."""
+        lib_path = tmp_path / "lib.vy"
+        lib_path.write_text(
+            """
+#pragma version 0.4.3
+
+counter: public(uint256)
+
+@external
+def bump():
+    self.counter += 1
+"""
+        )
+        main_path = tmp_path / "main.vy"
+        main_path.write_text("#pragma version 0.4.3\n\nimport lib\n")
+        lib_module = parse_module(str(lib_path))
+        main_module = parse_module(str(main_path), workspace_path=str(tmp_path))
+
+        calls = []
+
+        def get_module_func(doc):
+            calls.append(doc)
+            return lib_module
+
+        class MockWorkspace:
+            def get_text_document(self, uri):
+                return uri
+
+        first = get_module_completions(
+            get_module_func, MockWorkspace(), main_module, "lib"
+        )
+
+        def fail():
+            raise AssertionError("completions were recomputed")
+
+        monkeypatch.setattr(lib_module, "external_namespace", fail)
+        second = get_module_completions(
+            get_module_func, MockWorkspace(), main_module, "lib"
+        )
+
+        assert {"counter", "bump"} <= {c.label for c in first}
+        assert [c.label for c in second] == [c.label for c in first]
+        assert len(calls) == 2
@@ -1,10 +1,15 @@
 """Tests for the diagnostics module."""
 
+import pytest
 from lsprotocol.types import DiagnosticSeverity
 
+from couleuvre.features import diagnostics
 from couleuvre.features.diagnostics import (
+    compile_and_get_diagnostics,
+    compile_and_get_diagnostics_batch,
     parse_error_location,
     _parse_error_type,
+    _scan_traceback,
     _get_severity,
 )
 
@@ -63,6 +68,57 @@ class TestParseErrorType:
         assert _parse_error_type(traceback) is None
 
 
+class TestScanTraceback:
+    """Tests for _scan_traceback function."""
+
+    def test_matches_separate_parsers(self):
+        """Test that one scan finds what both parsers find."""
+        traceback = (
+            'File "x.py", in compile\n'
+            "vyper.exceptions.TypeMismatch: expected uint256\n"
+            '  function "foo", line 5:4\n'
+            "  line 7:1\n"
+        )
+        assert _scan_traceback(traceback) == (
+            _parse_error_type(traceback),
+            parse_error_location(traceback),
+        )
+        assert _scan_traceback(traceback) == ("TypeMismatch", (4, 4))
+
+    def test_nothing_found(self):
+        """Test a traceback without type nor location."""
+        assert _scan_traceback("ValueError: boom") == (None, (0, 0))
+
+
+class TestDiagnosticsFromOutput:
+    """Tests for _diagnostics_from_output function."""
+
+    def test_generic_error_uses_causes(self):
+        """Test that a generic error takes its type and location from its causes."""
+        output = {
+            "success": False,
+            "error_module": "builtins",
+            "error_qualname": "Exception",
+            "message": "compilation failed",
+            "causes": ["vyper.exceptions.TypeMismatch: bad type\n  line 3:8"],
+        }
+        [diagnostic] = diagnostics._diagnostics_from_output(output)
+
+        assert diagnostic.message == "[TypeMismatch] compilation failed"
+        assert diagnostic.range.start.line == 2
+        assert diagnostic.range.start.character == 8
+
+    def test_error_info_skips_traceback(self):
+        """Test that tracebacks are only formatted when debugging."""
+        try:
+            raise ValueError("boom")
+        except ValueError as e:
+            error_info = diagnostics._error_info_function()(e)
+
+        assert error_info["error_qualname"] == "ValueError"
+        assert "traceback" not in error_info
+
+
 class TestGetSeverity:
     """Tests for _get_severity function."""
 
@@ -76,3 +132,158 @@ class TestGetSeverity:
         """Test that certain types are warnings."""
         assert _get_severity("DeprecationWarning") == DiagnosticSeverity.Warning
         assert _get_severity("SyntaxWarning") == DiagnosticSeverity.Warning
+
+
+class TestCompileAndGetDiagnostics:
+    """Tests for compile_and_get_diagnostics function."""
+
+    @pytest.mark.parametrize("vyper_version", ["0.3.10", "0.4.3"])
+    def test_consecutive_runs_are_independent(self, tmp_path, vyper_version):
+        """Test that a failed compilation does not affect the next one."""
+        path = tmp_path / "contract.vy"
+        path.write_text("@external\ndef foo() -> uint256:\n    return x\n")
+        failed = compile_and_get_diagnostics(str(path), vyper_version)
+
+        path.write_text("@external\ndef foo() -> uint256:\n    return 1\n")
+        passed = compile_and_get_diagnostics(str(path), vyper_version)
+
+        assert len(failed) == 1
+        assert "UndeclaredDefinition" in failed[0].message
+        assert failed[0].range.start.line == 2
+        assert passed == []
+
+    def test_unchanged_file_is_not_recompiled(self, tmp_path, monkeypatch):
+        """Test that diagnostics are reused until the file or an import changes."""
+        lib = tmp_path / "lib.vy"
+        lib.write_text("x: uint256\n")
+        path = tmp_path / "contract.vy"
+        path.write_text("@external\ndef foo() -> uint256:\n    return x\n")
+        source = path.read_text()
+        first = compile_and_get_diagnostics(
+            str(path), "0.4.3", source=source, dependencies=[str(lib)]
+        )
+
+        calls = []
+        compile_diagnostics = diagnostics._compile_diagnostics
+
+        def counting_compile(*args):
+            calls.append(args)
+            return compile_diagnostics(*args)
+
+        monkeypatch.setattr(diagnostics, "_compile_diagnostics", counting_compile)
+        second = compile_and_get_diagnostics(
+            str(path), "0.4.3", source=source, dependencies=[str(lib)]
+        )
+        assert calls == []
+        assert second == first
+
+        lib.write_text("x: uint256\ny: uint256\n")
+        compile_and_get_diagnostics(
+            str(path), "0.4.3", source=source, dependencies=[str(lib)]
+        )
+        compile_and_get_diagnostics(
+            str(path), "0.4.3", source=source.replace("x", "1"), dependencies=[]
+        )
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("vyper_version", ["0.4.0", "0.4.3"])
+    def test_unsaved_buffer_is_compiled_in_memory(self, tmp_path, vyper_version):
+        """Test that an unsaved buffer is compiled without touching the disk."""
+        (tmp_path / "lib.vy").write_text("x: uint256\n")
+        path = tmp_path / "contract.vy"
+        path.write_text("import lib\n")
+        source = "import lib\n\n@external\ndef foo() -> uint256:\n    return y\n"
+
+        result = compile_and_get_diagnostics(
+            str(path), vyper_version, workspace_path=str(tmp_path), source=source
+        )
+
+        assert len(result) == 1
+        assert "'y' has not been declared" in result[0].message
+        assert result[0].range.start.line == 4
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["contract.vy", "lib.vy"]
+
+    @pytest.mark.parametrize("vyper_version", ["0.3.10", "0.4.3"])
+    def test_batch_compiles_each_file(self, tmp_path, vyper_version):
+        """Test that a batch reports the diagnostics of every file."""
+        good = tmp_path / "good.vy"
+        good.write_text("@external\ndef foo() -> uint256:\n    return 1\n")
+        bad = tmp_path / "bad.vy"
+        bad.write_text("@external\ndef foo() -> uint256:\n    return 1\n")
+        unsaved = "@external\ndef foo() -> uint256:\n    return x\n"
+
+        result = compile_and_get_diagnostics_batch(
+            [(str(good), None), (str(bad), unsaved)],
+            vyper_version,
+            workspace_path=str(tmp_path),
+        )
+
+        assert result[str(good)] == []
+        assert len(result[str(bad)]) == 1
+        assert "UndeclaredDefinition" in result[str(bad)][0].message
+        assert result[str(bad)][0].range.start.line == 2
+
+    def test_server_vyper_compiles_in_process(self, tmp_path, monkeypatch):
+        """Test that the Vyper installed alongside the server is used directly."""
+        import sys
+
+        from couleuvre.ast.environment import (
+            SystemEnvironment,
+            reset_environments,
+            resolve_environment,
+        )
+        from couleuvre.ast.vyper_wrapper import ensure_vyper_version
+
+        # Install the Vyper of a managed venv alongside the server, which
+        # resetting the environments makes the server find
+        [site_packages] = ensure_vyper_version("0.4.3").glob(
+            "lib/python*/site-packages"
+        )
+        monkeypatch.syspath_prepend(str(site_packages))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("compiled in a worker")
+
+        monkeypatch.setattr(SystemEnvironment, "run_worker_script", fail)
+
+        (tmp_path / "lib.vy").write_text("X: constant(uint256) = 1\n")
+        path = tmp_path / "contract.vy"
+        path.write_text(
+            "import lib\n\n@external\ndef foo() -> uint256:\n    return lib.X + y\n"
+        )
+        modules = set(sys.modules)
+        reset_environments()
+        try:
+            env = resolve_environment("0.4.3")
+            result = compile_and_get_diagnostics(
+                str(path), "0.4.3", workspace_path=str(tmp_path)
+            )
+        finally:
+            reset_environments()
+            diagnostics._buffer_input_bundle_class.cache_clear()
+            for name in set(sys.modules) - modules:
+                del sys.modules[name]
+
+        assert isinstance(env, SystemEnvironment)
+        assert env.get_sys_path()[0] == ""
+        assert len(result) == 1
+        assert "'y' has not been declared" in result[0].message
+        assert result[0].range.start.line == 4
+
+    def test_batch_does_not_share_unsaved_buffers(self, tmp_path):
+        """Test that a file of a batch imports the saved version of the others."""
+        (tmp_path / "lib.vy").write_text("X: constant(uint256) = 1\n")
+        main = tmp_path / "main.vy"
+        main.write_text(
+            "import lib\n\n@external\ndef foo() -> uint256:\n    return lib.X\n"
+        )
+        unsaved_lib = "Y: constant(uint256) = 1\n"
+
+        result = compile_and_get_diagnostics_batch(
+            [(str(tmp_path / "lib.vy"), unsaved_lib), (str(main), None)],
+            "0.4.3",
+            workspace_path=str(tmp_path),
+        )
+
+        assert result[str(main)] == []
+        assert result[str(tmp_path / "lib.vy")] == []
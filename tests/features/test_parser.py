@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import pytest
 from couleuvre.ast.parser import get_json_ast
 
@@ -37,3 +39,101 @@ def test_lsp_parses_vyper_contract(vyper_version):
         ast = get_json_ast(f.name, vyper_version)
     assert ast is not None
     assert hasattr(ast, "body")
+
+
+def test_get_json_ast_reuses_cached_ast(tmp_path):
+    path = tmp_path / "cached.vy"
+    path.write_text(EXAMPLE_VYPER_CONTRACT)
+
+    first = get_json_ast(str(path), "0.4.3")
+    assert get_json_ast(str(path), "0.4.3") is first
+
+    # Unsaved buffer contents are part of the key
+    edited = EXAMPLE_VYPER_CONTRACT.replace("x + 1", "x + 2")
+    from_buffer = get_json_ast(str(path), "0.4.3", source=edited)
+    assert from_buffer is not first
+    assert get_json_ast(str(path), "0.4.3", source=edited) is from_buffer
+
+    # Saving the file invalidates the previous entry
+    path.write_text(edited + "\n")
+    assert get_json_ast(str(path), "0.4.3") is not first
+
+
+def test_get_json_ast_parses_unsaved_buffer_in_memory(tmp_path):
+    (tmp_path / "lib.vy").write_text("x: uint256\n")
+    path = tmp_path / "main.vy"
+    source = "import lib\n" + EXAMPLE_VYPER_CONTRACT
+
+    # The buffer has never been saved: it is only available in memory
+    ast = get_json_ast(str(path), "0.4.3", workspace_path=str(tmp_path), source=source)
+
+    assert ast.body[0].ast_type == "Import"
+    assert ast.resolved_path == str(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["lib.vy"]
+
+
+@pytest.mark.parametrize("vyper_version", ["0.3.10", "0.4.3"])
+def test_get_json_asts_parses_files_in_one_batch(tmp_path, vyper_version):
+    from couleuvre.ast.parser import get_json_asts
+
+    good = tmp_path / "good.vy"
+    good.write_text(EXAMPLE_VYPER_CONTRACT)
+    other = tmp_path / "other.vy"
+    other.write_text(EXAMPLE_VYPER_CONTRACT.replace("foo", "bar"))
+    broken = tmp_path / "broken.vy"
+    broken.write_text("def foo(:\n")
+
+    asts = get_json_asts([str(good), str(other), str(broken)], vyper_version)
+
+    assert set(asts) == {str(good), str(other)}
+    assert asts[str(other)].body[0].name == "bar"
+
+
+def test_parse_workspace_parses_all_chunks(tmp_path):
+    from couleuvre.parser import parse_workspace
+
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"contract_{i}.vy"
+        path.write_text(
+            "# pragma version 0.4.3\n"
+            + EXAMPLE_VYPER_CONTRACT.replace("foo", f"foo_{i}")
+        )
+        paths.append(str(path))
+
+    modules = parse_workspace(paths, chunk_size=2)
+
+    assert set(modules) == set(paths)
+    assert modules[paths[3]].ast.body[0].name == "foo_3"
+    assert modules[paths[3]].source == Path(paths[3]).read_text()
+
+
+def test_parse_modules_parses_each_version(tmp_path):
+    from couleuvre.parser import parse_modules
+
+    old = tmp_path / "old.vy"
+    old.write_text("# pragma version 0.3.10\n" + EXAMPLE_VYPER_CONTRACT)
+    new = tmp_path / "new.vy"
+    new.write_text("# pragma version 0.4.3\n" + EXAMPLE_VYPER_CONTRACT)
+
+    modules = parse_modules([str(old), str(new)])
+
+    assert modules[str(old)].version == "0.3.10"
+    assert modules[str(new)].version == "0.4.3"
+    assert modules[str(new)].source == new.read_text()
+
+
+def test_parse_workspace_skips_versions_not_installed(tmp_path, monkeypatch):
+    from couleuvre import parser
+
+    old = tmp_path / "old.vy"
+    old.write_text("# pragma version 0.3.10\n" + EXAMPLE_VYPER_CONTRACT)
+    new = tmp_path / "new.vy"
+    new.write_text("# pragma version 0.4.3\n" + EXAMPLE_VYPER_CONTRACT)
+    monkeypatch.setattr(
+        parser, "is_environment_ready", lambda version: version == "0.4.3"
+    )
+
+    modules = parser.parse_workspace([str(old), str(new)], installed_only=True)
+
+    assert set(modules) == {str(new)}
@@ -5,6 +5,7 @@ Uses the VyperTestHarness for clean, declarative tests.
 Line numbers are 0-indexed (LSP convention).
 """
 
+import asyncio
 from unittest.mock import Mock
 from lsprotocol.types import (
     Position,
@@ -357,9 +358,35 @@ def foo():
             position=Position(line=100, character=100),
             context=ReferenceContext(include_declaration=False),
         )
-        result = goto_references(mock_language_server, params)
+        result = asyncio.run(goto_references(mock_language_server, params))
         assert result == []
 
+    def test_partial_results_are_streamed(self, vyper_harness):
+        """Test that references are sent as partial results when requested."""
+        source = """# pragma version 0.3.10
+
+counter: uint256
+
+@external
+def increment():
+    self.counter += 1
+"""
+        vyper_harness.setup(source, word_at_pos="self.counter")
+        vyper_harness.ls.protocol = Mock()
+
+        params = ReferenceParams(
+            text_document=TextDocumentIdentifier(uri="file:///test.vy"),
+            position=Position(line=0, character=0),
+            context=ReferenceContext(include_declaration=False),
+            partial_result_token="token",
+        )
+        result = asyncio.run(goto_references(vyper_harness.ls, params))
+
+        assert result == []
+        [(_, progress), _] = vyper_harness.ls.protocol.notify.call_args
+        assert progress.token == "token"
+        assert [loc.range.start.line for loc in progress.value] == [6]
+
 
 # =============================================================================
 # AST-Based Tests (for edge cases requiring manual AST construction)
@@ -411,7 +438,7 @@ def _call_refs(
         position=Position(line=0, character=0),
         context=ReferenceContext(include_declaration=include_declaration),
     )
-    return goto_references(mock_language_server, params)
+    return asyncio.run(goto_references(mock_language_server, params))
 
 
 class TestGotoReferencesAST:
@@ -711,3 +738,271 @@ def bar():
         vyper_harness.setup(source, word_at_pos="x")
         # When cursor is in foo(), only references from foo() should be found
         vyper_harness.assert_references_at_lines([5], cursor_line=5, cursor_char=17)
+
+
+class TestWorkspaceScan:
+    """Tests for references found in workspace files that are not loaded."""
+
+    def test_unloaded_importers_are_searched(self, tmp_path):
+        """Test that every importer found in the workspace is searched."""
+        from pygls import uris
+        from pygls.workspace import Workspace
+
+        from couleuvre.features.references import get_all_references
+        from couleuvre.parser import parse_module
+
+        (tmp_path / "lib.vy").write_text(
+            "# pragma version 0.4.3\n\n@internal\ndef bump():\n    pass\n"
+        )
+        for name in ("a", "b", "c"):
+            (tmp_path / f"{name}.vy").write_text(
+                "# pragma version 0.4.3\n\nimport lib\n\n"
+                "@external\ndef foo():\n    lib.bump()\n"
+            )
+        workspace = Workspace(uris.from_fs_path(str(tmp_path)))
+        lib_uri = uris.from_fs_path(str(tmp_path / "lib.vy"))
+        lib_doc = workspace.get_text_document(lib_uri)
+
+        def get_module(doc):
+            return parse_module(doc.path, workspace_path=str(tmp_path))
+
+        result = get_all_references(
+            get_module,
+            workspace,
+            lib_doc,
+            get_module(lib_doc),
+            Position(line=3, character=5),
+            {},
+            workspace_root=str(tmp_path),
+        )
+
+        assert sorted(
+            (loc.uri.rsplit("/", 1)[1], loc.range.start.line) for loc in result
+        ) == [
+            ("a.vy", 6),
+            ("b.vy", 6),
+            ("c.vy", 6),
+        ]
+
+    def test_server_searches_loaded_and_unloaded_importers(self, tmp_path, monkeypatch):
+        """Test that the server searches the workspace besides loaded modules."""
+        from lsprotocol.types import TextDocumentItem
+        from pygls import uris
+        from pygls.workspace import Workspace
+
+        from couleuvre import parser
+        from couleuvre.server import VyperLanguageServer
+
+        lib_source = "# pragma version 0.4.3\n\n@internal\ndef bump():\n    pass\n"
+        (tmp_path / "lib.vy").write_text(lib_source)
+        for name in ("loaded", "unloaded"):
+            (tmp_path / f"{name}.vy").write_text(
+                "# pragma version 0.4.3\n\nimport lib\n\n"
+                "@external\ndef foo():\n    lib.bump()\n"
+            )
+        # Files of a Vyper version that is not installed are not parsed
+        (tmp_path / "other_version.vy").write_text(
+            "# pragma version 0.4.2\n\nimport lib\n\n"
+            "@external\ndef foo():\n    lib.bump()\n"
+        )
+        (tmp_path / "broken.vy").write_text("# pragma version 0.4.3\nlib.bump(\n")
+        monkeypatch.setattr(
+            parser, "is_environment_ready", lambda version: version == "0.4.3"
+        )
+        workspace = Workspace(uris.from_fs_path(str(tmp_path)))
+        monkeypatch.setattr(
+            VyperLanguageServer, "workspace", property(lambda self: workspace)
+        )
+        ls = VyperLanguageServer("couleuvre-test", "v0")
+        lib_uri = uris.from_fs_path(str(tmp_path / "lib.vy"))
+        workspace.put_text_document(
+            TextDocumentItem(
+                uri=lib_uri, language_id="vyper", version=1, text=lib_source
+            )
+        )
+        loaded_uri = uris.from_fs_path(str(tmp_path / "loaded.vy"))
+        ls.parse(workspace.get_text_document(loaded_uri), str(tmp_path))
+        publish_mock = Mock()
+        monkeypatch.setattr(ls, "publish_diagnostics", publish_mock)
+
+        params = ReferenceParams(
+            text_document=TextDocumentIdentifier(uri=lib_uri),
+            position=Position(line=3, character=5),
+            context=ReferenceContext(include_declaration=False),
+        )
+        result = asyncio.run(goto_references(ls, params))
+
+        assert sorted(
+            (loc.uri.rsplit("/", 1)[1], loc.range.start.line) for loc in result
+        ) == [("loaded.vy", 6), ("unloaded.vy", 6)]
+        # Searched files are not loaded, and their errors are not reported
+        assert set(ls.modules) == {loaded_uri, lib_uri}
+        publish_mock.assert_not_called()
+
+    def test_prefilter_matches_raw_contents(self, tmp_path):
+        """Test that files are pre-filtered on their undecoded contents."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        (tmp_path / "hit.vy").write_bytes(b"# \xff\nx: uint256 = bump()\n")
+        (tmp_path / "miss.vy").write_text("x: uint256\n")
+        (tmp_path / "seen.vy").write_text("bump\n")
+        (tmp_path / "notes.txt").write_text("bump\n")
+
+        result = _find_files_with_pattern(
+            str(tmp_path), ["bump"], {str((tmp_path / "seen.vy").resolve())}
+        )
+
+        assert [p.name for p in result] == ["hit.vy"]
+
+    def test_prefilter_reads_changed_files_only(self, tmp_path, monkeypatch):
+        """Test that unchanged files are not read again by the pre-filter."""
+        import os
+
+        from couleuvre.features import references
+
+        path = tmp_path / "a.vy"
+        path.write_text("x: uint256 = bump()\n")
+        assert references._find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        def fail(*args):
+            raise AssertionError("unchanged file was read again")
+
+        monkeypatch.setattr(references, "open", fail, raising=False)
+        assert references._find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        monkeypatch.undo()
+        path.write_text("x: uint256 = 1\n")
+        os.utime(path, ns=(0, 0))
+        assert not references._find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+    def test_module_is_walked_once(self, monkeypatch):
+        """Test that repeated searches reuse the chains extracted from a module."""
+        from couleuvre.features import references
+
+        module = _make_module()
+        module.ast.body.append(_make_name("counter", 3))
+        uri = "file:///tmp/test.vy"
+
+        def find(module):
+            return references.find_references(
+                module, uri, [(["counter"], False)], False
+            )
+
+        assert len(find(module)) == 1
+
+        def fail(*args):
+            raise AssertionError("module was walked again")
+
+        monkeypatch.setattr(references, "_walk_ast", fail)
+        assert len(find(module)) == 1
+
+    def test_prefilter_excludes_resolved_paths(self, tmp_path):
+        """Test that files are excluded by their resolved path."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        real = tmp_path.resolve() / "real"
+        (real / "sub").mkdir(parents=True)
+        (real / "sub" / "seen.vy").write_text("bump\n")
+        (real / "linked.vy").symlink_to(real / "sub" / "seen.vy")
+        (real / "new.vy").write_text("bump\n")
+        (tmp_path / "root").symlink_to(real)
+
+        result = _find_files_with_pattern(
+            str(tmp_path / "root"), ["bump"], {str(real / "sub" / "seen.vy")}
+        )
+
+        assert [p.name for p in result] == ["new.vy"]
+
+    def test_prefilter_skips_comments_and_strings(self, tmp_path):
+        """Test that mentions in comments and strings do not make a candidate."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        (tmp_path / "hit.vy").write_text("x: uint256 = bump()  # bump\n")
+        (tmp_path / "comment.vy").write_text("# bump\nx: uint256\n")
+        (tmp_path / "string.vy").write_text('"""\nbump\n"""\ns: String[4] = "bump"\n')
+
+        result = _find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        assert [p.name for p in result] == ["hit.vy"]
+
+    def test_prefilter_honors_gitignore(self, tmp_path):
+        """Test that paths ignored by the workspace .gitignore are not scanned."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        (tmp_path / ".gitignore").write_text(
+            "# deps\nout/\n/lib/*\n!/lib/keep\n*.gen.vy\n"
+        )
+        for directory in ("out", "src/out", "lib/vendored", "lib/keep", "src"):
+            (tmp_path / directory).mkdir(parents=True, exist_ok=True)
+            (tmp_path / directory / "a.vy").write_text("bump\n")
+        (tmp_path / "src" / "b.gen.vy").write_text("bump\n")
+
+        result = _find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        assert sorted(p.relative_to(tmp_path).as_posix() for p in result) == [
+            "lib/keep/a.vy",
+            "src/a.vy",
+        ]
+
+    def test_prefilter_honors_nested_ignore_files(self, tmp_path):
+        """Test that nested .gitignore files and .git/info/exclude are read."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        (tmp_path / ".git" / "info").mkdir(parents=True)
+        (tmp_path / ".git" / "info" / "exclude").write_text("local.vy\n")
+        (tmp_path / ".gitignore").write_text("old.vy/\n[!m]*.mock.vy\n\\#*\n")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / ".gitignore").write_text("/gen\n!m.mock.vy\n")
+        for path in (
+            "local.vy",
+            "#draft.vy",
+            "old.vy",
+            "src/old.vy/a.vy",
+            "src/gen/a.vy",
+            "src/x.mock.vy",
+            "src/m.mock.vy",
+            "src/lib/gen/a.vy",
+        ):
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text("bump\n")
+
+        result = _find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        assert sorted(p.relative_to(tmp_path).as_posix() for p in result) == [
+            "old.vy",
+            "src/lib/gen/a.vy",
+            "src/m.mock.vy",
+        ]
+
+    def test_prefilter_prunes_only_tooling_directories(self, tmp_path):
+        """Test that project directories are scanned, even hidden or named venv."""
+        from couleuvre.features.references import _find_files_with_pattern
+
+        for directory in (".git", ".venv", "node_modules", "venv", ".contracts"):
+            (tmp_path / directory).mkdir()
+            (tmp_path / directory / "a.vy").write_text("bump\n")
+
+        result = _find_files_with_pattern(str(tmp_path), ["bump"], set())
+
+        assert sorted(p.relative_to(tmp_path).as_posix() for p in result) == [
+            ".contracts/a.vy",
+            "venv/a.vy",
+        ]
+
+    def test_module_without_the_name_is_not_walked(self, monkeypatch):
+        """Test that a module whose source lacks the name is skipped."""
+        from couleuvre.features import references
+
+        module = _make_module()
+        module.ast.body.append(_make_name("total", 1))
+        module.source = "total: uint256\n"
+
+        def fail(*args, **kwargs):
+            raise AssertionError("module was walked")
+
+        monkeypatch.setattr(references, "_walk_ast", fail)
+        result = references.find_references(
+            module, "file:///tmp/test.vy", [(["self", "counter"], False)], False
+        )
+
+        assert result == []
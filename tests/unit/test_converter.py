@@ -0,0 +1,75 @@
+import sys
+
+from couleuvre.ast.nodes import AST_CLASS_MAP, BinOp, Int, Module
+from couleuvre.ast.parser import _from_vyper_json_ast
+
+
+def _int(value):
+    return {"ast_type": "Int", "value": value}
+
+
+def test_converter_links_children_to_parents():
+    module = _from_vyper_json_ast(
+        {
+            "ast_type": "Module",
+            "body": [{"ast_type": "Expr", "value": _int(1)}],
+        }
+    )
+
+    assert isinstance(module, Module)
+    assert module.parent is None
+    expr = module.body[0]
+    assert expr.parent is module
+    assert isinstance(expr.value, Int)
+    assert expr.value.parent is expr
+
+
+def test_converter_handles_asts_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() + 100
+    ast_dict = _int(0)
+    for i in range(depth):
+        ast_dict = {
+            "ast_type": "BinOp",
+            "left": ast_dict,
+            "op": {"ast_type": "Add"},
+            "right": _int(i),
+        }
+
+    node = _from_vyper_json_ast(ast_dict)
+
+    for _ in range(depth):
+        assert isinstance(node, BinOp)
+        assert node.left.parent is node
+        node = node.left
+    assert isinstance(node, Int)
+
+
+def test_converted_nodes_are_slotted():
+    module = _from_vyper_json_ast({"ast_type": "Module", "body": [_int(1)]})
+
+    assert not hasattr(module, "__dict__")
+    assert not hasattr(module.body[0], "__dict__")
+
+
+def test_all_node_classes_are_slotted():
+    for name, cls in AST_CLASS_MAP.items():
+        assert not hasattr(cls(ast_type=name), "__dict__"), name
+
+
+def test_converter_interns_identifiers():
+    def name(identifier):
+        # Built at runtime so that the strings are distinct objects
+        return {"ast_type": "Name", "id": "".join(identifier)}
+
+    module = _from_vyper_json_ast(
+        {
+            "ast_type": "Module",
+            "body": [
+                {"ast_type": "Expr", "value": name(["se", "lf"])},
+                {"ast_type": "Expr", "value": name(["s", "elf"])},
+            ],
+        }
+    )
+
+    first, second = (expr.value for expr in module.body)
+    assert first.id is second.id is sys.intern("self")
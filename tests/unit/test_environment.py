@@ -0,0 +1,53 @@
+from couleuvre.ast import environment
+from couleuvre.ast.environment import (
+    CouleuvreEnvironment,
+    reset_environments,
+    resolve_environment,
+)
+
+
+def test_managed_environment_ignores_server_pythonpath(monkeypatch, tmp_path):
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    env = CouleuvreEnvironment("0.4.3")
+
+    script = "import os; print(os.environ.get('PYTHONPATH'))"
+    assert env.run_worker_script(script).stdout.strip() == b"None"
+    assert str(tmp_path) not in env.get_sys_path()
+
+
+def test_environments_are_resolved_once(monkeypatch):
+    env = resolve_environment("0.4.3")
+    search_paths = env.get_search_paths()
+
+    def fail():
+        raise AssertionError("sys.path was read again")
+
+    monkeypatch.setattr(env, "get_sys_path", fail)
+    assert resolve_environment("0.4.3") is env
+    assert env.get_search_paths() == search_paths
+
+    reset_environments()
+    assert resolve_environment("0.4.3") is not env
+    assert environment._sys_path_cache == {}
+
+
+def test_failed_sys_path_read_is_retried(monkeypatch):
+    env = CouleuvreEnvironment("0.4.3")
+    reads = [[], ["/venv/site-packages"]]
+    monkeypatch.setattr(env, "get_sys_path", lambda: reads.pop(0))
+
+    assert env.get_search_paths() == ["."]
+    assert env.get_search_paths() == ["/venv/site-packages", "."]
+
+
+def test_search_paths_follow_venv_changes(monkeypatch):
+    env = CouleuvreEnvironment("0.4.3")
+    venv = {"mtime": 1, "sys_path": ["/old"]}
+    monkeypatch.setattr(env, "_sys_path_state", lambda: venv["mtime"])
+    monkeypatch.setattr(env, "get_sys_path", lambda: list(venv["sys_path"]))
+
+    assert env.get_search_paths() == ["/old", "."]
+    venv["sys_path"] = ["/new"]
+    assert env.get_search_paths() == ["/old", "."]
+    venv["mtime"] = 2
+    assert env.get_search_paths() == ["/new", "."]
@@ -4,6 +4,7 @@ from types import SimpleNamespace
 from typing import cast
 from unittest.mock import Mock
 
+from couleuvre.features import references
 from couleuvre.parser import Module
 from couleuvre.server import VyperLanguageServer
 
@@ -37,14 +38,14 @@ def test_schedule_import_parsing_uses_saved_loop_from_worker_thread(monkeypatch)
     monkeypatch.setattr(
         server_module.uris, "from_fs_path", lambda path: f"file://{path}"
     )
-    parse_import_mock = Mock()
-    monkeypatch.setattr(ls, "_parse_import", parse_import_mock)
+    parse_imports_mock = Mock()
+    monkeypatch.setattr(ls, "_parse_imports", parse_imports_mock)
 
     ls.schedule_import_parsing(module, workspace_path="/tmp/workspace")
 
     assert fake_loop.threadsafe_calls == 1
     assert fake_loop.created_tasks == 1
-    parse_import_mock.assert_not_called()
+    parse_imports_mock.assert_not_called()
 
 
 def test_schedule_import_parsing_falls_back_to_inline_without_loop(monkeypatch):
@@ -55,11 +56,382 @@ def test_schedule_import_parsing_falls_back_to_inline_without_loop(monkeypatch):
     monkeypatch.setattr(
         server_module.uris, "from_fs_path", lambda path: f"file://{path}"
     )
-    parse_import_mock = Mock()
-    monkeypatch.setattr(ls, "_parse_import", parse_import_mock)
+    parse_imports_mock = Mock()
+    monkeypatch.setattr(ls, "_parse_imports", parse_imports_mock)
 
     ls.schedule_import_parsing(module, workspace_path="/tmp/workspace")
 
-    parse_import_mock.assert_called_once_with(
-        "file:///tmp/dep.vy", "/tmp/dep.vy", "/tmp/workspace"
+    parse_imports_mock.assert_called_once_with(
+        [("file:///tmp/dep.vy", "/tmp/dep.vy")], "/tmp/workspace"
     )
+
+
+def test_shutdown_stops_vyper_workers(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    shutdown_workers_mock = Mock()
+    monkeypatch.setattr(server_module, "shutdown_workers", shutdown_workers_mock)
+
+    server_module.shutdown(ls, None)
+
+    shutdown_workers_mock.assert_called_once_with()
+
+
+def test_schedule_prewarm_prepares_version_in_background(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    prewarm_mock = Mock()
+    monkeypatch.setattr(server_module, "prewarm_environment", prewarm_mock)
+
+    async def run() -> None:
+        ls.schedule_prewarm(None)
+        ls.schedule_prewarm("0.4.3")
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*pending)
+
+    asyncio.run(run())
+
+    prewarm_mock.assert_called_once_with("0.4.3")
+
+
+def test_cancel_diagnostics_drops_scheduled_run(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    run_mock = Mock()
+
+    async def run_full_diagnostics(doc, workspace_path):
+        run_mock(doc.uri)
+
+    monkeypatch.setattr(server_module, "DIAGNOSTICS_DEBOUNCE_DELAY", 0)
+    monkeypatch.setattr(ls, "_run_full_diagnostics", run_full_diagnostics)
+    kept = SimpleNamespace(uri="file:///kept.vy")
+    closed = SimpleNamespace(uri="file:///closed.vy")
+
+    async def run() -> None:
+        ls.schedule_diagnostics(kept)
+        ls.schedule_diagnostics(closed)
+        ls.cancel_diagnostics(closed.uri)
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    asyncio.run(run())
+
+    run_mock.assert_called_once_with(kept.uri)
+    assert ls._diagnostics_tasks == {}
+
+
+def test_document_diagnostic_reports_unchanged_results(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    doc = SimpleNamespace(uri="file:///contract.vy")
+    workspace = SimpleNamespace(root_path=None, get_text_document=lambda uri: doc)
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    diagnostic = server_module.create_diagnostic("boom", 1, 2)
+
+    async def get_full_diagnostics(doc, workspace_path):
+        return [diagnostic]
+
+    monkeypatch.setattr(ls, "get_full_diagnostics", get_full_diagnostics)
+
+    def pull(previous_result_id):
+        params = server_module.types.DocumentDiagnosticParams(
+            text_document=server_module.types.TextDocumentIdentifier(uri=doc.uri),
+            previous_result_id=previous_result_id,
+        )
+        return asyncio.run(server_module.document_diagnostic(ls, params))
+
+    full = pull(None)
+    unchanged = pull(full.result_id)
+
+    assert full.items == [diagnostic]
+    assert isinstance(
+        unchanged, server_module.types.RelatedUnchangedDocumentDiagnosticReport
+    )
+    assert unchanged.result_id == full.result_id
+
+
+def test_workspace_diagnostic_batches_open_documents(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    docs = {
+        uri: SimpleNamespace(uri=uri, path=uri[len("file://") :], source="", version=1)
+        for uri in ("file:///a.vy", "file:///b.vy", "file:///c.vy")
+    }
+    workspace = SimpleNamespace(
+        root_path=None, text_documents=docs, get_text_document=docs.__getitem__
+    )
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    ls.modules["file:///a.vy"] = cast(
+        Module, SimpleNamespace(version="0.4.3", imports={})
+    )
+    ls.modules["file:///b.vy"] = cast(
+        Module, SimpleNamespace(version="0.4.3", imports={})
+    )
+    diagnostic = server_module.create_diagnostic("boom", 1, 2)
+    batches = []
+
+    def compile_batch(files, version, workspace_path, dependencies):
+        batches.append((files, version))
+        return {"/a.vy": [diagnostic], "/b.vy": []}
+
+    monkeypatch.setattr(
+        server_module, "compile_and_get_diagnostics_batch", compile_batch
+    )
+
+    def pull(previous_result_ids):
+        params = server_module.types.WorkspaceDiagnosticParams(
+            previous_result_ids=previous_result_ids
+        )
+        return asyncio.run(server_module.workspace_diagnostic(ls, params))
+
+    full = pull([])
+    unchanged = pull(
+        [
+            server_module.types.PreviousResultId(uri=item.uri, value=item.result_id)
+            for item in full.items
+        ]
+    )
+
+    assert batches[0] == ([("/a.vy", ""), ("/b.vy", "")], "0.4.3")
+    assert {item.uri: item.items for item in full.items} == {
+        "file:///a.vy": [diagnostic],
+        "file:///b.vy": [],
+    }
+    assert all(item.kind == "unchanged" for item in unchanged.items)
+
+
+def test_workspace_diagnostic_streams_partial_results(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    docs = {
+        uri: SimpleNamespace(uri=uri, path=uri[len("file://") :], source="", version=1)
+        for uri in ("file:///a.vy", "file:///b.vy")
+    }
+    workspace = SimpleNamespace(
+        root_path=None, text_documents=docs, get_text_document=docs.__getitem__
+    )
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    for uri in docs:
+        ls.modules[uri] = cast(Module, SimpleNamespace(version="0.4.3", imports={}))
+    monkeypatch.setattr(server_module, "DIAGNOSTICS_BATCH_SIZE", 1)
+    monkeypatch.setattr(
+        server_module,
+        "compile_and_get_diagnostics_batch",
+        lambda files, *args: {path: [] for path, _ in files},
+    )
+    notifications = []
+    monkeypatch.setattr(
+        ls.protocol, "notify", lambda method, params: notifications.append(params)
+    )
+
+    params = server_module.types.WorkspaceDiagnosticParams(
+        previous_result_ids=[], partial_result_token="token"
+    )
+    report = asyncio.run(server_module.workspace_diagnostic(ls, params))
+
+    assert report.items == []
+    assert len(notifications) == 2
+    assert {item.uri for params in notifications for item in params.value.items} == set(
+        docs
+    )
+
+
+def test_full_diagnostics_skip_compilation_of_unparsable_source(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    doc = cast(
+        server_module.TextDocument,
+        SimpleNamespace(uri="file:///a.vy", path="/a.vy", source="def foo(:\n"),
+    )
+    ls.modules[doc.uri] = cast(Module, SimpleNamespace(version="0.4.3", imports={}))
+    monkeypatch.setattr(ls, "publish_diagnostics", Mock())
+
+    def fail_parse(*args, **kwargs):
+        raise RuntimeError("line 1:8 invalid syntax")
+
+    monkeypatch.setattr(server_module, "parse_module", fail_parse)
+    compile_mock = Mock(return_value=[])
+    monkeypatch.setattr(server_module, "compile_and_get_diagnostics", compile_mock)
+
+    assert ls.parse(doc) is False
+    [diagnostic] = asyncio.run(ls.get_full_diagnostics(doc))
+
+    assert diagnostic.message == "line 1:8 invalid syntax"
+    assert diagnostic.range.start.character == 8
+    compile_mock.assert_not_called()
+
+    doc.source = "def foo():\n    pass\n"
+    asyncio.run(ls.get_full_diagnostics(doc))
+    compile_mock.assert_called_once()
+
+
+def test_workspace_is_parsed_on_start_only_when_asked(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    workspace = SimpleNamespace(root_path="/tmp/workspace")
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    monkeypatch.setattr(ls, "schedule_workspace_prewarm", Mock())
+    monkeypatch.setattr(ls, "watch_vyper_files", Mock())
+    schedule_mock = Mock()
+    monkeypatch.setattr(ls, "schedule_workspace_parsing", schedule_mock)
+
+    server_module.initialized(ls, None)
+    schedule_mock.assert_not_called()
+
+    server_module.initialize(
+        ls, SimpleNamespace(initialization_options={"parseWorkspace": True})
+    )
+    server_module.initialized(ls, None)
+    schedule_mock.assert_called_once_with("/tmp/workspace")
+
+
+def test_changed_files_drop_modules_not_open(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    workspace = SimpleNamespace(text_documents={"file:///open.vy": Mock()})
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    ls.modules = {"file:///open.vy": Mock(), "file:///disk.vy": Mock()}
+    params = SimpleNamespace(
+        changes=[
+            SimpleNamespace(uri="file:///open.vy"),
+            SimpleNamespace(uri="file:///disk.vy"),
+            SimpleNamespace(uri="file:///unknown.vy"),
+        ]
+    )
+
+    server_module.did_change_watched_files(ls, params)
+
+    assert set(ls.modules) == {"file:///open.vy"}
+
+
+def test_changed_files_drop_search_data(monkeypatch, tmp_path):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    workspace = SimpleNamespace(text_documents={})
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    changed = tmp_path / "changed.vy"
+    kept = tmp_path / "kept.vy"
+    for path in (changed, kept):
+        path.write_text("x: uint256\n")
+        references._file_identifiers(str(path))
+    link = tmp_path / "link.vy"
+    link.symlink_to(changed)
+    assert references.normalize_path(str(link)) == str(changed.resolve())
+
+    link.unlink()
+    link.symlink_to(kept)
+    params = SimpleNamespace(changes=[SimpleNamespace(uri=changed.as_uri())])
+    server_module.did_change_watched_files(ls, params)
+
+    assert str(changed) not in references._identifier_cache
+    assert str(kept) in references._identifier_cache
+    assert references.normalize_path(str(link)) == str(kept.resolve())
+
+
+def test_cancelled_references_stop_between_modules(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    doc = SimpleNamespace(uri="file:///a.vy")
+    workspace = SimpleNamespace(root_path=None, get_text_document=lambda uri: doc)
+    monkeypatch.setattr(
+        VyperLanguageServer, "workspace", property(lambda self: workspace)
+    )
+    monkeypatch.setattr(ls, "get_module", lambda doc, workspace_path=None: Mock())
+    searched = []
+
+    def iter_all_references(*args, **kwargs):
+        for name in ("a", "b", "c"):
+            searched.append(name)
+            yield [name]
+
+    monkeypatch.setattr(server_module, "iter_all_references", iter_all_references)
+    params = SimpleNamespace(
+        text_document=doc, position=None, context=None, partial_result_token="token"
+    )
+
+    async def run() -> None:
+        task = asyncio.ensure_future(server_module.goto_references(ls, params))
+        # The client cancels the request once the first module is reported
+        monkeypatch.setattr(ls, "protocol", Mock(notify=lambda *args: task.cancel()))
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert task.cancelled()
+
+    asyncio.run(run())
+
+    assert "c" not in searched
+
+
+def test_full_diagnostics_depend_on_indirect_imports(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    doc = cast(
+        server_module.TextDocument,
+        SimpleNamespace(uri="file:///a.vy", path="/a.vy", source="import b\n"),
+    )
+    ls.modules["file:///a.vy"] = cast(
+        Module, SimpleNamespace(version="0.4.3", imports={"b": "/b.vy"})
+    )
+    ls.modules["file:///b.vy"] = cast(
+        Module, SimpleNamespace(version="0.4.3", imports={"c": "/c.vy"})
+    )
+    ls.modules["file:///c.vy"] = cast(
+        Module, SimpleNamespace(version="0.4.3", imports={"b": "/b.vy"})
+    )
+    compile_mock = Mock(return_value=[])
+    monkeypatch.setattr(server_module, "compile_and_get_diagnostics", compile_mock)
+
+    asyncio.run(ls.get_full_diagnostics(doc))
+
+    dependencies = compile_mock.call_args.args[4]
+    assert sorted(dependencies) == ["/b.vy", "/c.vy"]
+
+
+def test_workspace_prewarm_prepares_most_requested_version(monkeypatch, tmp_path):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    for name, version in (("a", "0.4.3"), ("b", "0.4.3"), ("c", "0.3.10")):
+        (tmp_path / f"{name}.vy").write_text(f"# pragma version {version}\n")
+    prewarm_mock = Mock()
+    monkeypatch.setattr(server_module, "prewarm_environment", prewarm_mock)
+
+    async def run() -> None:
+        ls.schedule_workspace_prewarm(str(tmp_path))
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        while pending:
+            await asyncio.gather(*pending)
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+
+    asyncio.run(run())
+
+    prewarm_mock.assert_called_once_with("0.4.3")
+
+
+def test_document_of_missing_version_is_parsed_in_background(monkeypatch):
+    ls = VyperLanguageServer("couleuvre-test", "v0")
+    doc = cast(
+        server_module.TextDocument,
+        SimpleNamespace(uri="file:///a.vy", path="/a.vy", source="# @version 0.4.2\n"),
+    )
+    monkeypatch.setattr(server_module, "is_environment_ready", lambda version: False)
+    prewarm_mock = Mock()
+    monkeypatch.setattr(server_module, "prewarm_environment", prewarm_mock)
+    parse_mock = Mock(return_value=True)
+    monkeypatch.setattr(ls, "parse", parse_mock)
+    diagnostics_mock = Mock()
+    monkeypatch.setattr(ls, "schedule_diagnostics", diagnostics_mock)
+
+    async def run() -> None:
+        ls.open_document(doc, None)
+        parse_mock.assert_not_called()
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        while pending:
+            await asyncio.gather(*pending)
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+
+    asyncio.run(run())
+
+    prewarm_mock.assert_called_once_with("0.4.2")
+    parse_mock.assert_called_once_with(doc, None)
+    diagnostics_mock.assert_called_once_with(doc, workspace_path=None)
@@ -0,0 +1,77 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from couleuvre.ast.worker import VyperWorker, WorkerError, WorkerPool
+
+
+def test_worker_runs_scripts_in_one_process(tmp_path):
+    worker = VyperWorker(sys.executable)
+    try:
+        first = worker.run("import os; print(os.getpid())")
+        second = worker.run("import os; print(os.getpid())", cwd=str(tmp_path))
+        cwd = worker.run("import os; print(os.getcwd())", cwd=str(tmp_path))
+    finally:
+        worker.close()
+
+    assert first.returncode == 0
+    assert first.stdout == second.stdout
+    assert cwd.stdout.decode().strip() == str(tmp_path)
+
+
+def test_worker_reports_errors_and_keeps_running():
+    worker = VyperWorker(sys.executable)
+    try:
+        failed = worker.run("raise ValueError('boom')")
+        exited = worker.run("import sys; sys.exit(3)")
+        binary = worker.run("import sys; sys.stdout.buffer.write(b'\\x00\\xff')")
+    finally:
+        worker.close()
+
+    assert failed.returncode == 1
+    assert b"ValueError: boom" in failed.stderr
+    assert exited.returncode == 3
+    assert binary.stdout == b"\x00\xff"
+
+
+def test_worker_passes_arguments_to_scripts():
+    worker = VyperWorker(sys.executable)
+    script = "print(args['name'], args['count'] * 2)"
+    try:
+        first = worker.run(script, args={"name": "a", "count": 1})
+        second = worker.run(script, args={"name": "b", "count": 2})
+        without = worker.run("print(args)")
+    finally:
+        worker.close()
+
+    assert first.stdout == b"a 2\n"
+    assert second.stdout == b"b 4\n"
+    assert without.stdout == b"None\n"
+
+
+def test_worker_restarts_after_crash():
+    worker = VyperWorker(sys.executable)
+    try:
+        worker.run("pass")
+        # The crashing script is retried once in a fresh worker, then reported
+        with pytest.raises(WorkerError):
+            worker.run("import os; os._exit(1)")
+        recovered = worker.run("print('ok')")
+    finally:
+        worker.close()
+
+    assert recovered.stdout == b"ok\n"
+
+
+def test_pool_spreads_concurrent_requests_over_workers():
+    pool = WorkerPool(sys.executable, max_workers=2)
+    script = "import os, time; time.sleep(0.2); print(os.getpid())"
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: pool.run(script), range(4)))
+    finally:
+        pool.close()
+
+    pids = {result.stdout for result in results}
+    assert len(pids) == 2